@@ -0,0 +1,26 @@
+import os
+import sqlite3
+import threading
+
+# Diretório dos arquivos locais (bancos SQLite e exportações)
+DADOS_DIR = os.getenv("DADOS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados'))
+
+_esquemas_criados = set()
+_esquemas_lock = threading.Lock()
+
+
+def caminho(nome_arquivo):
+    os.makedirs(DADOS_DIR, exist_ok=True)
+    return os.path.join(DADOS_DIR, nome_arquivo)
+
+
+def conectar(nome_banco, esquema):
+    """Abre uma conexão com o banco SQLite em DADOS_DIR, criando as tabelas na primeira vez."""
+    arquivo = caminho(nome_banco)
+    conexao = sqlite3.connect(arquivo, timeout=30)
+    with _esquemas_lock:
+        if arquivo not in _esquemas_criados:
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.executescript(esquema)
+            _esquemas_criados.add(arquivo)
+    return conexao
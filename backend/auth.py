@@ -1,6 +1,5 @@
 
 import os
-import msal
 from flask import session, request
 
 # Carrega as configurações do ambiente
@@ -12,6 +11,7 @@ SCOPE = [os.getenv("SCOPE")]
 
 def _build_msal_app(cache=None, authority=None):
     """Cria uma instância do ConfidentialClientApplication da MSAL."""
+    import msal  # Só é carregada quando alguém faz login
     return msal.ConfidentialClientApplication(
         CLIENT_ID, authority=authority or AUTHORITY,
         client_credential=CLIENT_SECRET, token_cache=cache)
@@ -26,6 +26,7 @@ def _build_auth_url(authority=None, scopes=None, state=None):
 
 def _get_token_from_code(authority=None, scopes=None):
     """Troca o código de autorização por um token de acesso."""
+    import msal
     cache = msal.SerializableTokenCache()
     if session.get("token_cache"):
         cache.deserialize(session["token_cache"])
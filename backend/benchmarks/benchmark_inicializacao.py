@@ -0,0 +1,90 @@
+"""Mede o tempo de inicialização do servidor web e do worker.
+
+Cada medição roda num interpretador novo, como num contêiner recém-criado:
+o tempo para importar `app` e responder à primeira requisição (/api/me, sem
+login) e o tempo para importar o `worker`. Mostra a mediana das rodadas e os
+módulos mais lentos de importar.
+
+Uso:
+    python benchmarks/benchmark_inicializacao.py [--rodadas 5]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+DIRETORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEDIR_APP = """
+import time, json
+inicio = time.perf_counter()
+import app
+importado = time.perf_counter()
+app.app.test_client().get('/api/me')
+respondido = time.perf_counter()
+print(json.dumps({'importacao': importado - inicio, 'primeira_requisicao': respondido - importado}))
+"""
+
+MEDIR_WORKER = """
+import time, json
+inicio = time.perf_counter()
+import worker
+print(json.dumps({'importacao': time.perf_counter() - inicio}))
+"""
+
+
+def _ambiente():
+    ambiente = dict(os.environ)
+    ambiente.setdefault('REDIRECT_PATH', '/getAToken')
+    ambiente.setdefault('FLASK_SECRET_KEY', 'benchmark')
+    ambiente['DADOS_DIR'] = tempfile.mkdtemp(prefix='benchmark_inicializacao_')
+    return ambiente
+
+
+def rodar(codigo, *opcoes):
+    resultado = subprocess.run([sys.executable, *opcoes, '-c', codigo], cwd=DIRETORIO_BACKEND, env=_ambiente(),
+                               capture_output=True, text=True, check=True)
+    return resultado
+
+
+def modulos_mais_lentos(modulo, quantidade=8):
+    """Módulos de nível mais alto com maior tempo acumulado de importação (python -X importtime)."""
+    saida = rodar(f'import {modulo}', '-X', 'importtime').stderr
+    tempos = []
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, acumulado, nome = linha[len('import time:'):].split('|')
+        # Só os importados diretamente pelo módulo medido (dois espaços de recuo)
+        if nome.startswith('   ') and not nome.startswith('    '):
+            tempos.append((int(acumulado) / 1e6, nome.strip()))
+    return sorted(tempos, reverse=True)[:quantidade]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rodadas', type=int, default=5)
+    args = parser.parse_args()
+
+    medicoes_app = [json.loads(rodar(MEDIR_APP).stdout) for _ in range(args.rodadas)]
+    medicoes_worker = [json.loads(rodar(MEDIR_WORKER).stdout) for _ in range(args.rodadas)]
+
+    importacao_app = statistics.median(m['importacao'] for m in medicoes_app)
+    primeira_requisicao = statistics.median(m['primeira_requisicao'] for m in medicoes_app)
+    print(f'Mediana de {args.rodadas} rodadas')
+    print(f'app: importação              {importacao_app:7.3f} s')
+    print(f'app: primeira requisição     {primeira_requisicao:7.3f} s')
+    print(f'app: até a primeira resposta {importacao_app + primeira_requisicao:7.3f} s')
+    print(f'worker: importação           {statistics.median(m["importacao"] for m in medicoes_worker):7.3f} s')
+
+    for modulo in ('app', 'worker'):
+        print(f'\nImportações mais lentas de {modulo}:')
+        for segundos, nome in modulos_mais_lentos(modulo):
+            print(f'  {nome:30s} {segundos:7.3f} s')
+
+
+if __name__ == '__main__':
+    main()
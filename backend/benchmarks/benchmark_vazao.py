@@ -0,0 +1,161 @@
+"""Mede a vazão de ponta a ponta contra o eSAJ falso (`esaj_falso.py`), sem acessar o tribunal.
+
+Sobe o eSAJ falso num processo separado (ou usa o informado em --url), roda o
+worker dentro deste processo e envia lotes simultâneos por /api/processar,
+como usuários diferentes. Cada lote acompanha /api/resultados até o fim.
+Ao final, mostra processos por segundo, latência p50/p95 de cada processo
+(do envio do lote até o item aparecer em /api/resultados), o pico de memória
+(RSS) e o tempo médio de cada etapa.
+
+O banco e as exportações vão para um diretório temporário, então o cache começa
+vazio. Por padrão o limitador de taxa fica alto o bastante para não ser o gargalo;
+exporte ESAJ_TAXA e ESAJ_RAJADA para medir com os valores de produção.
+
+Uso:
+    python benchmarks/benchmark_vazao.py [--processos 200] [--lotes 4] [--latencia 0.2] [--erros 0.01]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import resource
+import tempfile
+import threading
+import statistics
+import subprocess
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIRETORIO))
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def iniciar_esaj_falso(latencia, erros, limitacoes):
+    """Sobe o eSAJ falso num processo próprio, para não disputar o GIL nem somar à memória medida."""
+    porta = porta_livre()
+    processo = subprocess.Popen(
+        [sys.executable, os.path.join(DIRETORIO, 'esaj_falso.py'), '--porta', str(porta), '--latencia', str(latencia),
+         '--erros', str(erros), '--limitacoes', str(limitacoes)],
+        stdout=subprocess.DEVNULL)
+    limite = time.monotonic() + 10
+    while time.monotonic() < limite:
+        try:
+            socket.create_connection(('127.0.0.1', porta), timeout=0.5).close()
+            return processo, f'http://127.0.0.1:{porta}'
+        except OSError:
+            time.sleep(0.05)
+    processo.kill()
+    sys.exit('O eSAJ falso não respondeu a tempo.')
+
+
+def gerar_numeros(quantidade, ano='2024', origem='0100'):
+    """Gera números CNJ do TJSP distintos e com dígito verificador válido."""
+    numeros = []
+    for sequencial in range(1, quantidade + 1):
+        sequencial = f'{sequencial:07d}'
+        digito = 98 - int(sequencial + ano + '826' + origem) * 100 % 97
+        numeros.append(f'{sequencial}-{digito:02d}.{ano}.8.26.{origem}')
+    return numeros
+
+
+def executar_lote(app, usuario, numeros, intervalo, latencias, categorias):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['user'] = {'oid': usuario}
+    inicio = time.perf_counter()
+    resposta = cliente.post('/api/processar', json={'processos': '\n'.join(numeros)})
+    task_id = resposta.get_json()['task_id']
+    cursor = 0
+    while True:
+        dados = json.loads(cliente.get(f'/api/resultados/{task_id}?cursor={cursor}').data)
+        agora = time.perf_counter()
+        for item in dados['itens']:
+            latencias.append(agora - inicio)
+            categorias[item['categoria']] = categorias.get(item['categoria'], 0) + 1
+        cursor = dados['cursor']
+        if dados['fim']:
+            return
+        time.sleep(intervalo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processos', type=int, default=200, help='total de processos, divididos entre os lotes')
+    parser.add_argument('--lotes', type=int, default=4, help='lotes enviados ao mesmo tempo, cada um por um usuário')
+    parser.add_argument('--latencia', type=float, default=0.2, help='latência média do eSAJ falso, em segundos')
+    parser.add_argument('--erros', type=float, default=0.0, help='fração das respostas com 503')
+    parser.add_argument('--limitacoes', type=float, default=0.0, help='fração das respostas com 429')
+    parser.add_argument('--url', help='usa um eSAJ falso já em execução, em vez de subir um')
+    parser.add_argument('--intervalo', type=float, default=0.05, help='intervalo entre consultas a /api/resultados')
+    args = parser.parse_args()
+
+    servidor = None
+    if args.url:
+        url = args.url
+    else:
+        servidor, url = iniciar_esaj_falso(args.latencia, args.erros, args.limitacoes)
+
+    # A configuração precisa estar no ambiente antes de importar a aplicação
+    os.environ['ESAJ_BASE_URL'] = url
+    os.environ['DADOS_DIR'] = tempfile.mkdtemp(prefix='benchmark_vazao_')
+    os.environ.setdefault('ESAJ_TAXA', '10000')
+    os.environ.setdefault('ESAJ_RAJADA', '10000')
+    os.environ.setdefault('WORKER_INTERVALO', '0.05')
+    os.environ.setdefault('REDIRECT_PATH', '/getAToken')
+    os.environ.setdefault('FLASK_SECRET_KEY', 'benchmark')
+
+    import app as aplicacao
+    import worker
+    import metricas
+    from cliente_esaj import MAX_CONEXOES
+
+    parar = threading.Event()
+    thread_worker = threading.Thread(target=worker.executar, args=(parar,), daemon=True)
+    thread_worker.start()
+
+    numeros = gerar_numeros(args.processos)
+    lotes = [numeros[i::args.lotes] for i in range(args.lotes)]
+    latencias = []
+    categorias = {}
+    print(f'{args.processos} processos em {args.lotes} lotes contra {url}; '
+          f'{worker.TAREFAS_SIMULTANEAS} tarefas simultâneas x {MAX_CONEXOES} consultas por tarefa')
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=executar_lote, args=(aplicacao.app, f'benchmark-{i}', lote, args.intervalo, latencias, categorias))
+               for i, lote in enumerate(lotes) if lote]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+
+    parar.set()
+    thread_worker.join()
+    if servidor:
+        servidor.terminate()
+        servidor.wait()
+
+    percentis = statistics.quantiles(latencias, n=20) if len(latencias) > 1 else latencias * 19
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    pico_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+    print(f'Duração:       {duracao:8.2f} s')
+    print(f'Vazão:         {len(latencias) / duracao:8.2f} processos/s')
+    print(f'Latência p50:  {percentis[9]:8.2f} s')
+    print(f'Latência p95:  {percentis[18]:8.2f} s')
+    print(f'Pico de RSS:   {pico_rss:8.1f} MiB')
+    print('Categorias:    ' + ', '.join(f'{categoria}={n}' for categoria, n in sorted(categorias.items())))
+    print('Desfechos:     ' + ', '.join(f'{desfecho}={n}' for desfecho, n in sorted(metricas.instantaneo()['desfechos'].items())))
+    print('Tempo médio por etapa:')
+    for etapa, histograma in sorted(metricas.instantaneo()['histogramas'].items()):
+        print(f'  {etapa:28s} {histograma["soma"] / histograma["contagem"]:8.3f} s  ({histograma["contagem"]} vezes)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Servidor local que imita o eSAJ, para testes de carga sem acessar o tribunal.
+
+Serve as páginas salvas em `paginas/` nas mesmas rotas do cpopg e do cposg
+(pesquisa, listagem, detalhe, modal de incidentes e segredo de justiça), com
+latência e taxas de erro configuráveis. Cada número de processo cai sempre no
+mesmo cenário, sorteado a partir do próprio número.
+
+Uso:
+    python benchmarks/esaj_falso.py [--porta 8081] [--latencia 0.2] [--erros 0.01] [--limitacoes 0.01]
+
+Depois aponte a aplicação para ele com ESAJ_BASE_URL=http://127.0.0.1:8081.
+"""
+import os
+import sys
+import time
+import zlib
+import random
+import argparse
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DIRETORIO_PAGINAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'paginas')
+NUMERO_PAGINAS = '1000123-45.2023.8.26.0100'  # Número que aparece nas páginas salvas
+
+# Cenários e seus pesos: onde o processo é encontrado e como o eSAJ responde
+CENARIOS = {
+    '2_grau': 25,
+    '2_grau_incidente': 10,
+    'duas_instancias': 10,  # Em grau de recurso: aparece no 2º grau e continua no 1º
+    '1_grau': 25,
+    '1_grau_listagem': 10,
+    '1_grau_incidente': 5,
+    'segredo': 5,
+    'nao_encontrado': 10,
+}
+
+PAGINAS_1_GRAU = {
+    '1_grau': '1_grau_detalhe.html',
+    'duas_instancias': '1_grau_detalhe.html',
+    '1_grau_listagem': 'listagem_1_grau.html',
+    '1_grau_incidente': 'incidente_1_grau.html',
+    'segredo': 'segredo_1_grau.html',
+}
+
+
+def carregar_paginas(diretorio=DIRETORIO_PAGINAS):
+    paginas = {}
+    for nome in os.listdir(diretorio):
+        if nome.endswith('.html'):
+            with open(os.path.join(diretorio, nome), encoding='utf-8') as arquivo:
+                paginas[nome] = arquivo.read()
+    return paginas
+
+
+def cenario(numero):
+    """Sorteia o cenário do processo de forma determinística, pelo próprio número."""
+    posicao = zlib.crc32(numero.encode()) % sum(CENARIOS.values())
+    for nome, peso in CENARIOS.items():
+        if posicao < peso:
+            return nome
+        posicao -= peso
+    return 'nao_encontrado'
+
+
+class EsajFalso(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, como o servidor real
+
+    paginas = {}
+    latencia = 0.0
+    taxa_erros = 0.0
+    taxa_limitacoes = 0.0
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, status, corpo='', cabecalhos=None):
+        conteudo = corpo.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=UTF-8')
+        self.send_header('Content-Length', str(len(conteudo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def _pagina(self, nome, numero):
+        html = self.paginas[nome].replace(NUMERO_PAGINAS, numero)
+        # Os links da listagem levam o número adiante, para o detalhe sair com o processo certo
+        return html.replace('show.do?', f'show.do?numero={numero}&amp;')
+
+    def _tratar(self, parametros):
+        if self.latencia:
+            # Variação de ±50% em torno da latência média
+            time.sleep(random.uniform(0.5, 1.5) * self.latencia)
+        sorteio = random.random()
+        if sorteio < self.taxa_limitacoes:
+            return self._responder(429, cabecalhos={'Retry-After': '1'})
+        if sorteio < self.taxa_limitacoes + self.taxa_erros:
+            return self._responder(503)
+
+        rota = urlsplit(self.path).path
+        numero = (parametros.get('dePesquisaNuUnificado') or parametros.get('dadosConsulta.valorConsultaNuUnificado')
+                  or parametros.get('numero') or [NUMERO_PAGINAS])[0]
+        caso = cenario(numero)
+
+        if rota == '/cposg/search.do':
+            if caso in ('2_grau', 'duas_instancias'):
+                return self._responder(200, self._pagina('2_grau_detalhe.html', numero))
+            if caso == '2_grau_incidente':
+                return self._responder(200, self._pagina('modal_incidentes_2_grau.html', numero))
+            return self._responder(200, self._pagina('nao_encontrado.html', numero))
+        if rota == '/cposg/show.do':
+            return self._responder(200, self._pagina('2_grau_detalhe.html', numero))
+        if rota == '/cpopg/search.do':
+            return self._responder(200, self._pagina(PAGINAS_1_GRAU.get(caso, 'nao_encontrado.html'), numero))
+        if rota == '/cpopg/show.do':
+            return self._responder(200, self._pagina('1_grau_detalhe.html', numero))
+        return self._responder(404)
+
+    def do_GET(self):
+        self._tratar(parse_qs(urlsplit(self.path).query))
+
+    def do_POST(self):
+        tamanho = int(self.headers.get('Content-Length', 0))
+        parametros = parse_qs(urlsplit(self.path).query)
+        parametros.update(parse_qs(self.rfile.read(tamanho).decode('utf-8')))
+        self._tratar(parametros)
+
+
+def criar_servidor(porta=0, latencia=0.0, taxa_erros=0.0, taxa_limitacoes=0.0, diretorio=DIRETORIO_PAGINAS):
+    """Cria o servidor (porta 0 escolhe uma porta livre); chame `serve_forever()` para atendê-lo."""
+    tratador = type('EsajFalsoConfigurado', (EsajFalso,), {
+        'paginas': carregar_paginas(diretorio),
+        'latencia': latencia,
+        'taxa_erros': taxa_erros,
+        'taxa_limitacoes': taxa_limitacoes,
+    })
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), tratador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--porta', type=int, default=8081)
+    parser.add_argument('--latencia', type=float, default=0.2, help='latência média de cada resposta, em segundos')
+    parser.add_argument('--erros', type=float, default=0.0, help='fração das respostas com erro 503')
+    parser.add_argument('--limitacoes', type=float, default=0.0, help='fração das respostas com 429 (Retry-After: 1)')
+    parser.add_argument('--paginas', default=DIRETORIO_PAGINAS)
+    args = parser.parse_args()
+
+    servidor = criar_servidor(args.porta, args.latencia, args.erros, args.limitacoes, args.paginas)
+    print(f'eSAJ falso em http://127.0.0.1:{servidor.server_address[1]}', flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
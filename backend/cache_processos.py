@@ -0,0 +1,78 @@
+import os
+import json
+import time
+from contextlib import closing
+
+from armazenamento import conectar
+from registros import Registro
+
+# Configurações do cache, carregadas do ambiente
+CACHE_TTL = int(os.getenv("CACHE_TTL", str(24 * 3600)))  # em segundos
+CACHE_TTL_NEGATIVO = int(os.getenv("CACHE_TTL_NEGATIVO", "3600"))  # em segundos, para erros e inconclusivos
+CACHE_MAX_ENTRADAS = int(os.getenv("CACHE_MAX_ENTRADAS", "50000"))
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    numero TEXT PRIMARY KEY,
+    categoria TEXT NOT NULL,
+    dados TEXT NOT NULL,
+    expira_em REAL NOT NULL,
+    acessado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_acessado_em ON cache (acessado_em);
+CREATE INDEX IF NOT EXISTS cache_expira_em ON cache (expira_em);
+"""
+
+
+def _conectar():
+    return conectar('cache_processos.sqlite3', ESQUEMA)
+
+
+def obter_varios(numeros, montar=lambda categoria, dados: (categoria, dados)):
+    """Retorna {numero: montar(categoria, dados)} para os processos com entrada válida no cache."""
+    numeros = list(numeros)
+    agora = time.time()
+    encontrados = {}
+    with closing(_conectar()) as conexao, conexao:
+        # Consulta em blocos para respeitar o limite de parâmetros do SQLite
+        for i in range(0, len(numeros), 500):
+            bloco = numeros[i:i + 500]
+            marcadores = ','.join('?' * len(bloco))
+            linhas = conexao.execute(
+                f'SELECT numero, categoria, dados FROM cache WHERE numero IN ({marcadores}) AND expira_em > ?',
+                (*bloco, agora)).fetchall()
+            for numero, categoria, dados in linhas:
+                encontrados[numero] = montar(categoria, json.loads(dados))
+        if encontrados:
+            conexao.executemany('UPDATE cache SET acessado_em = ? WHERE numero = ?', [(agora, n) for n in encontrados])
+    return encontrados
+
+
+def obter_registros(numeros):
+    """Retorna {numero: Registro} dos processos em cache, sem manter as linhas completas na memória."""
+    return obter_varios(numeros, Registro)
+
+
+def obter(numero):
+    """Retorna (categoria, dados) do processo, ou None se não houver entrada válida."""
+    return obter_varios([numero]).get(numero)
+
+
+def guardar(numero, categoria, dados):
+    """Guarda o resultado de um processo. Erros e inconclusivos expiram antes dos resultados."""
+    agora = time.time()
+    ttl = CACHE_TTL if categoria == 'resultado' else CACHE_TTL_NEGATIVO
+    with closing(_conectar()) as conexao, conexao:
+        conexao.execute(
+            'INSERT OR REPLACE INTO cache (numero, categoria, dados, expira_em, acessado_em) VALUES (?, ?, ?, ?, ?)',
+            (numero, categoria, json.dumps(dados, ensure_ascii=False), agora + ttl, agora))
+        _despejar(conexao, agora)
+
+
+def _despejar(conexao, agora):
+    """Remove as entradas expiradas e, acima do limite, as menos acessadas."""
+    conexao.execute('DELETE FROM cache WHERE expira_em <= ?', (agora,))
+    excedente = conexao.execute('SELECT COUNT(*) FROM cache').fetchone()[0] - CACHE_MAX_ENTRADAS
+    if excedente > 0:
+        conexao.execute(
+            'DELETE FROM cache WHERE numero IN (SELECT numero FROM cache ORDER BY acessado_em LIMIT ?)', (excedente,))
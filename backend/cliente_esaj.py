@@ -0,0 +1,86 @@
+import os
+import threading
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from extrator import Pagina
+from limitador import limitador_para
+
+BASE_URL = os.getenv("ESAJ_BASE_URL", "https://esaj.tjsp.jus.br").rstrip('/')  # Outro endereço só para testes (benchmarks/esaj_falso.py)
+MAX_CONEXOES = int(os.getenv("ESAJ_MAX_CONEXOES", "8"))
+TIMEOUT_REQUISICAO = float(os.getenv("ESAJ_TIMEOUT", "30"))  # em segundos
+TENTATIVAS = int(os.getenv("ESAJ_TENTATIVAS", "3"))
+
+# Limita quantas requisições ao eSAJ ficam abertas ao mesmo tempo no processo
+_limite_conexoes = threading.BoundedSemaphore(MAX_CONEXOES)
+
+
+def _criar_sessao():
+    """Cria a sessão HTTP compartilhada, com keep-alive e pool de conexões."""
+    sessao = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONEXOES)
+    sessao.mount('https://', adapter)
+    sessao.mount('http://', adapter)
+    return sessao
+
+
+sessao = _criar_sessao()
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After', ''))
+    except ValueError:
+        return None
+
+
+def _requisitar(metodo, url, **kwargs):
+    """Envia a requisição passando pelo limitador do host.
+
+    Respostas 429 e 5xx e timeouts reduzem a taxa do limitador e são tentados
+    de novo até TENTATIVAS vezes.
+    """
+    kwargs.setdefault('timeout', TIMEOUT_REQUISICAO)
+    limitador = limitador_para(url)
+    for tentativa in range(1, TENTATIVAS + 1):
+        limitador.aguardar()
+        try:
+            with _limite_conexoes:
+                response = sessao.request(metodo, url, **kwargs)
+        except (requests.Timeout, requests.ConnectionError):
+            limitador.registrar_falha()
+            if tentativa == TENTATIVAS:
+                raise
+            continue
+        if response.status_code == 429 or response.status_code >= 500:
+            limitador.registrar_falha(_retry_after(response))
+            if tentativa < TENTATIVAS:
+                continue
+        else:
+            limitador.registrar_sucesso()
+        response.raise_for_status()
+        return response
+
+
+def obter(url, **kwargs):
+    """Faz um GET reaproveitando as conexões abertas com o eSAJ."""
+    return _requisitar('GET', url, **kwargs)
+
+
+def enviar(url, data, **kwargs):
+    """Faz um POST reaproveitando as conexões abertas com o eSAJ."""
+    return _requisitar('POST', url, data=data, **kwargs)
+
+
+def consultar_processo_1_grau(numero_processo):
+    """Consulta o processo no 1º grau (cpopg) e retorna a página já interpretada."""
+    params = {'conversationId': '', 'cbPesquisa': 'NUMPROC', 'numeroDigitoAnoUnificado': numero_processo[:15], 'foroNumeroUnificado': numero_processo[-4:], 'dadosConsulta.valorConsultaNuUnificado': numero_processo, 'dadosConsulta.valorConsulta': '', 'dadosConsulta.tipoNuProcesso': 'UNIFICADO'}
+    response = obter(f'{BASE_URL}/cpopg/search.do', params=params)
+    pagina = Pagina(response.content)
+    href = pagina.link_processo(numero_processo)
+    if href:
+        return Pagina(obter(urljoin(response.url, href)).content)
+    return pagina
+
@@ -0,0 +1,37 @@
+import threading
+from concurrent.futures import Future
+
+
+class Coalescedor:
+    """Junta chamadas simultâneas com a mesma chave numa única execução.
+
+    A primeira chamada executa a função; as que chegam enquanto ela está em
+    andamento esperam e recebem o mesmo resultado (ou a mesma exceção).
+    """
+
+    def __init__(self):
+        self._em_andamento = {}
+        self._lock = threading.Lock()
+
+    def executar(self, chave, funcao, *args):
+        with self._lock:
+            futuro = self._em_andamento.get(chave)
+            responsavel = futuro is None
+            if responsavel:
+                futuro = Future()
+                self._em_andamento[chave] = futuro
+
+        if not responsavel:
+            return futuro.result()
+
+        try:
+            resultado = funcao(*args)
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado
+        finally:
+            with self._lock:
+                del self._em_andamento[chave]
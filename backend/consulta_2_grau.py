@@ -0,0 +1,71 @@
+from urllib.parse import urljoin
+
+from cliente_esaj import BASE_URL, obter, enviar
+from extrator import Pagina
+
+
+class PaginaNaoSuportada(Exception):
+    """A página retornada pelo eSAJ depende do navegador para ser tratada."""
+
+
+def _reconhecida(pagina):
+    """Indica se a página é uma das que o restante do fluxo sabe interpretar."""
+    return pagina.tem('numeroProcesso') or pagina.tem('mensagemRetorno') or pagina.paginacao() is not None
+
+
+def _opcao_incidente(pagina):
+    if pagina.raiz is None:
+        return None
+    opcoes = pagina.raiz.xpath('//input[@name="processoSelecionado"]')
+    return opcoes[0] if opcoes else None
+
+
+def _enviar_incidente(opcao, url_atual):
+    """Reproduz via HTTP a escolha do incidente no modal (`processoSelecionado` + `botaoEnviarIncidente`)."""
+    forms = opcao.xpath('ancestor::form[1]')
+    form = forms[0] if forms else None
+    if form is None or not form.get('action'):
+        raise PaginaNaoSuportada('Modal de incidentes sem formulário.')
+
+    campos = {}
+    for campo in form.iterdescendants('input'):
+        nome = campo.get('name')
+        if not nome or campo.get('type') in ('submit', 'button', 'image'):
+            continue
+        if campo.get('type') in ('radio', 'checkbox'):
+            # Assim como no navegador, seleciona a primeira opção oferecida
+            campos.setdefault(nome, campo.get('value', 'on'))
+        else:
+            campos[nome] = campo.get('value', '')
+
+    action = urljoin(url_atual, form.get('action'))
+    if form.get('method', 'get').lower() == 'post':
+        return enviar(action, campos)
+    return obter(action, params=campos)
+
+
+def consultar_processo_2_grau_http(numero_processo):
+    """Consulta o processo no 2º grau (cposg) usando apenas requisições HTTP.
+
+    Segue o fluxo pesquisa → listagem → detalhe, incluindo o envio do modal de
+    incidentes, e retorna a página já interpretada. Lança `PaginaNaoSuportada`
+    quando a página exige o navegador.
+    """
+    params = {'conversationId': '', 'paginaConsulta': '0', 'cbPesquisa': 'NUMPROC', 'numeroDigitoAnoUnificado': numero_processo[:15], 'foroNumeroUnificado': numero_processo[-4:], 'dePesquisaNuUnificado': numero_processo, 'dePesquisa': '', 'tipoNuProcesso': 'UNIFICADO'}
+    response = obter(f'{BASE_URL}/cposg/search.do', params=params)
+    pagina = Pagina(response.content)
+
+    if pagina.tem('listagemDeProcessos'):
+        href = pagina.link_processo(numero_processo)
+        if href:
+            return Pagina(obter(urljoin(response.url, href)).content)
+        return pagina
+
+    opcao = _opcao_incidente(pagina)
+    if opcao is not None:
+        response = _enviar_incidente(opcao, response.url)
+        pagina = Pagina(response.content)
+
+    if not _reconhecida(pagina):
+        raise PaginaNaoSuportada('Página do 2º grau não reconhecida.')
+    return pagina
@@ -0,0 +1,158 @@
+import os
+import csv
+import shutil
+import threading
+from datetime import datetime
+
+import tarefas
+from armazenamento import caminho
+from registros import COLUNAS_RESULTADOS, COLUNAS_ERROS, COLUNAS_INCONCLUSIVOS
+
+DIRETORIO_EXPORTACOES = 'exportacoes'
+LOTE_PARQUET = 5000  # Linhas por grupo no arquivo Parquet
+
+COLUNAS_TABELA = ['Categoria'] + COLUNAS_RESULTADOS + ['Observações']
+
+FORMATOS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'txt': 'text/plain',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+_lock = threading.Lock()
+
+
+class FormatoIndisponivel(Exception):
+    """O formato depende de um pacote opcional que não está instalado."""
+
+
+def _diretorio(task_id):
+    return os.path.join(caminho(DIRETORIO_EXPORTACOES), task_id)
+
+
+def _escrever_xlsx(task_id, destino):
+    # Importado aqui para não pesar na inicialização do servidor web
+    from openpyxl import Workbook
+    # No modo write-only cada linha vai direto para o disco
+    workbook = Workbook(write_only=True)
+    planilhas = {
+        'resultado': workbook.create_sheet('Resultados'),
+        'erro': workbook.create_sheet('Erros ou não processados'),
+        'inconclusivo': workbook.create_sheet('Inconclusivos'),
+    }
+    planilhas['resultado'].append(COLUNAS_RESULTADOS)
+    planilhas['erro'].append(COLUNAS_ERROS)
+    planilhas['inconclusivo'].append(COLUNAS_INCONCLUSIVOS)
+    for categoria, linha in tarefas.iterar_registros(task_id):
+        planilhas[categoria].append(list(linha.values()))
+    workbook.save(destino)
+
+
+def _escrever_txt(task_id, destino, emitido_em):
+    with open(destino, 'w', encoding='utf-8') as output:
+        output.write(f'Resultado dos processos recebidos:\n\n')
+        for categoria, l in tarefas.iterar_registros(task_id):
+            if categoria != 'resultado':
+                continue
+            output.write(f'\nNúmero do processo: {l["Número do Processo"]}\n')
+            output.write(f'Foro e Vara / Órgão Julgador: {l["Foro e Vara / Órgão Julgador"]}\n')
+            output.write(f'Juiz / Relator: {l["Juiz / Relator"]}\n')
+            output.write(f'Classe: {l["Classe"]}\n')
+            output.write(f'Assunto: {l["Assunto"]}\n')
+            output.write(f'Situação: {l["Situação"]}\n')
+            output.write(f'Partes e Advogados: {l["Partes e Advogados"]}\n')
+            output.write(f'Valor: {l["Valor"]}\n')
+
+            if l['Data'] is not None and l['Movimento'] is not None:
+                output.write(f'Data: {l["Data"]}\n')
+                output.write(f'Movimentação: {l["Movimento"]}\n\n')
+            output.write('*'.ljust(40, '*') + '\n')
+
+        output.write('\n\nRelatório emitido em: ' + emitido_em)
+
+
+def _linhas_tabela(task_id):
+    """Une resultados, erros e inconclusivos numa só tabela, própria para CSV e Parquet."""
+    for categoria, linha in tarefas.iterar_registros(task_id):
+        if categoria == 'resultado':
+            yield [categoria] + list(linha.values()) + [None]
+        else:
+            numero, observacao = linha.values()
+            yield [categoria, numero] + [None] * (len(COLUNAS_RESULTADOS) - 1) + [observacao]
+
+
+def _escrever_csv(task_id, destino):
+    # utf-8-sig para o Excel reconhecer a acentuação ao abrir o arquivo
+    with open(destino, 'w', encoding='utf-8-sig', newline='') as arquivo:
+        writer = csv.writer(arquivo)
+        writer.writerow(COLUNAS_TABELA)
+        writer.writerows(_linhas_tabela(task_id))
+
+
+def _escrever_parquet(task_id, destino):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise FormatoIndisponivel('Exportação em Parquet requer o pacote pyarrow.')
+
+    schema = pa.schema([(coluna, pa.string()) for coluna in COLUNAS_TABELA])
+    with pq.ParquetWriter(destino, schema) as writer:
+        lote = []
+        for linha in _linhas_tabela(task_id):
+            lote.append(linha)
+            if len(lote) == LOTE_PARQUET:
+                writer.write_table(pa.Table.from_pylist([dict(zip(COLUNAS_TABELA, l)) for l in lote], schema=schema))
+                lote = []
+        if lote:
+            writer.write_table(pa.Table.from_pylist([dict(zip(COLUNAS_TABELA, l)) for l in lote], schema=schema))
+
+
+def _emitido_em(task):
+    """Data e hora de conclusão da tarefa, no formato usado no nome e no rodapé dos arquivos."""
+    return datetime.fromisoformat(task['timestamp_conclusao']).strftime('%d-%m-%Y_%Hh%Mmin')
+
+
+def gerar(task_id, formato, task=None):
+    """Gera (uma única vez) o arquivo da tarefa no formato pedido e retorna seu caminho."""
+    task = task or tarefas.obter_tarefa(task_id)
+    diretorio = _diretorio(task_id)
+    destino = os.path.join(diretorio, f'Resultados.{formato}')
+    if os.path.exists(destino):
+        return destino
+
+    with _lock:
+        if os.path.exists(destino):
+            return destino
+        os.makedirs(diretorio, exist_ok=True)
+        # Nome único, pois o worker e o servidor web podem gerar o mesmo arquivo ao mesmo tempo
+        temporario = f'{destino}.{os.getpid()}.tmp'
+        if formato == 'xlsx':
+            _escrever_xlsx(task_id, temporario)
+        elif formato == 'txt':
+            _escrever_txt(task_id, temporario, _emitido_em(task))
+        elif formato == 'csv':
+            _escrever_csv(task_id, temporario)
+        elif formato == 'parquet':
+            _escrever_parquet(task_id, temporario)
+        else:
+            raise ValueError(f'Formato desconhecido: {formato}')
+        # A troca atômica garante que ninguém sirva um arquivo pela metade
+        os.replace(temporario, destino)
+    return destino
+
+
+def gerar_padrao(task_id):
+    """Gera os formatos baixados pelo frontend assim que a tarefa é concluída."""
+    task = tarefas.obter_tarefa(task_id)
+    for formato in ('xlsx', 'txt', 'csv'):
+        gerar(task_id, formato, task)
+
+
+def nome_arquivo(task, formato):
+    return f'Resultados_{_emitido_em(task)}.{formato}'
+
+
+def remover(task_id):
+    shutil.rmtree(_diretorio(task_id), ignore_errors=True)
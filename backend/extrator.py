@@ -0,0 +1,174 @@
+from lxml import etree
+from lxml import html as lxml_html
+
+from metricas import medir
+
+NAO_DISPONIVEL = 'Não disponível'
+
+# Elementos procurados pelo id e pela classe; só a primeira ocorrência de cada um interessa
+IDS = frozenset([
+    'numeroProcesso', 'foroProcesso', 'varaProcesso', 'juizProcesso', 'classeProcesso', 'assuntoProcesso',
+    'valorAcaoProcesso', 'labelSituacaoProcesso', 'orgaoJulgadorProcesso', 'relatorProcesso', 'situacaoProcesso',
+    'tablePartesPrincipais', 'tabelaUltimasMovimentacoes', 'mensagemRetorno', 'listagemDeProcessos',
+])
+CLASSES = frozenset([
+    'nomeParteEAdvogado', 'containerMovimentacao', 'movimentacaoProcesso', 'descricaoMovimentacao',
+    'resultadoPaginacao',
+])
+
+# Conteúdo que o BeautifulSoup não considera texto (scripts, estilos e templates)
+_TAGS_SEM_TEXTO = frozenset(['script', 'style', 'template'])
+
+_AVISO_CNJ = "Atendendo a resolução 121 do CNJ"
+
+
+def _textos(elemento):
+    if elemento.tag not in _TAGS_SEM_TEXTO and elemento.text:
+        yield elemento.text
+    for filho in elemento:
+        if isinstance(filho.tag, str):
+            yield from _textos(filho)
+        if filho.tail:
+            yield filho.tail
+
+
+def texto(elemento):
+    """Texto do elemento, equivalente ao `.text` do BeautifulSoup."""
+    return ''.join(_textos(elemento))
+
+
+def _string_unica(elemento):
+    """Equivalente ao `.string` do BeautifulSoup: o texto do único filho, ou None."""
+    filhos = [elemento.text] if elemento.text else []
+    for filho in elemento:
+        filhos.append(filho)
+        if filho.tail:
+            filhos.append(filho.tail)
+    if len(filhos) != 1:
+        return None
+    filho = filhos[0]
+    if isinstance(filho, str):
+        return filho
+    return _string_unica(filho) if isinstance(filho.tag, str) else filho.text
+
+
+def separa_dados(celulas):
+    return [' '.join(' '.join(_textos(celula)).split()) for celula in celulas]
+
+
+class Pagina:
+    """Página do eSAJ interpretada uma única vez com lxml.
+
+    Todos os elementos usados na extração são localizados numa só passada pela
+    árvore; os métodos `dados_*` montam o mesmo registro de 9 campos dos
+    extratores originais.
+    """
+
+    def __init__(self, conteudo):
+        self.por_id = {}
+        self.por_classe = {}
+        self.cabecalho = None
+        self.senha = False
+        self.aviso_cnj = False
+        with medir('extracao'):
+            self._indexar(conteudo)
+
+    def _indexar(self, conteudo):
+        if isinstance(conteudo, bytes):
+            try:
+                conteudo = conteudo.decode('utf-8')
+            except UnicodeDecodeError:
+                conteudo = conteudo.decode('cp1252', errors='replace')
+        try:
+            self.raiz = lxml_html.fromstring(conteudo)
+        except (etree.ParserError, ValueError):
+            self.raiz = None
+            return
+
+        for elemento in self.raiz.iter(etree.Element):
+            id_elemento = elemento.get('id')
+            if id_elemento in IDS and id_elemento not in self.por_id:
+                self.por_id[id_elemento] = elemento
+            classes = elemento.get('class')
+            if classes:
+                classes = classes.split()
+                for classe in classes:
+                    if classe in CLASSES and classe not in self.por_classe:
+                        self.por_classe[classe] = elemento
+                if elemento.tag == 'span' and self.cabecalho is None and 'unj-larger' in classes:
+                    self.cabecalho = elemento
+            if elemento.tag == 'td':
+                string = _string_unica(elemento)
+                if string:
+                    if string == 'Senha do processo' and classes and 'modalTitulo' in classes:
+                        self.senha = True
+                    if _AVISO_CNJ in string:
+                        self.aviso_cnj = True
+
+    def _campo(self, id_elemento):
+        elemento = self.por_id.get(id_elemento)
+        return texto(elemento).strip() if elemento is not None else NAO_DISPONIVEL
+
+    def _parte(self):
+        elemento = self.por_classe.get('nomeParteEAdvogado')
+        if elemento is None:
+            return NAO_DISPONIVEL
+        return texto(elemento).strip().replace('\n', '').replace('\t', '').replace('  ', '')
+
+    def _movimentacoes(self, classe):
+        elemento = self.por_classe.get(classe)
+        return separa_dados(elemento.iterdescendants('td')) if elemento is not None else []
+
+    def tem(self, id_elemento):
+        return id_elemento in self.por_id
+
+    def link_processo(self, numero_processo):
+        """Retorna o href do link para o processo na listagem de resultados, se houver."""
+        listagem = self.por_id.get('listagemDeProcessos')
+        if listagem is None:
+            return None
+        for link in listagem.iterdescendants('a'):
+            if 'linkProcesso' in link.get('class', '').split() and numero_processo in ''.join(s.strip() for s in _textos(link)):
+                return link.get('href')
+        return None
+
+    def segredo_de_justica(self):
+        return (self.senha or self.aviso_cnj) and not (self.tem('tablePartesPrincipais') and self.tem('tabelaUltimasMovimentacoes'))
+
+    def paginacao(self):
+        elemento = self.por_classe.get('resultadoPaginacao')
+        return texto(elemento).strip() if elemento is not None else None
+
+    def mensagem_retorno(self):
+        elemento = self.por_id.get('mensagemRetorno')
+        return texto(elemento).strip() if elemento is not None else None
+
+    def movimentacoes(self):
+        """Células da tabela de movimentações, do 1º ou do 2º grau, como no último campo dos registros."""
+        return self._movimentacoes('containerMovimentacao') or self._movimentacoes('movimentacaoProcesso')
+
+    def dados_1_grau(self):
+        if not self.tem('numeroProcesso'):
+            return None
+        foro_vara = f'{self._campo("foroProcesso")} - {self._campo("varaProcesso")}'
+        return [self._campo('numeroProcesso'), foro_vara, self._campo('juizProcesso'), self._campo('classeProcesso'),
+                self._campo('assuntoProcesso'), self._campo('labelSituacaoProcesso'), self._parte(),
+                self._campo('valorAcaoProcesso'), self._movimentacoes('containerMovimentacao')]
+
+    def dados_1_grau_incidente(self, n_processo):
+        if self.cabecalho is None:
+            return None
+        cabecalho = texto(self.cabecalho)
+        classe = ''.join(s.strip() for s in _textos(self.cabecalho)).split('(')[0].strip() if '(' in cabecalho else NAO_DISPONIVEL
+        foro_vara = f'{self._campo("foroProcesso")} - {self._campo("varaProcesso")}'
+        primeira_mov = self.por_classe.get('descricaoMovimentacao')
+        situacao = ''.join(s.strip() for s in _textos(primeira_mov)).split('\n')[0].strip() if primeira_mov is not None else NAO_DISPONIVEL
+        return [n_processo, foro_vara, NAO_DISPONIVEL, classe, self._campo('assuntoProcesso'), situacao, self._parte(),
+                NAO_DISPONIVEL, self._movimentacoes('containerMovimentacao')]
+
+    def dados_2_grau(self):
+        if not self.tem('numeroProcesso'):
+            return None
+        return [self._campo('numeroProcesso'), self._campo('orgaoJulgadorProcesso'), self._campo('relatorProcesso'),
+                self._campo('classeProcesso'), self._campo('assuntoProcesso'), self._campo('situacaoProcesso'),
+                self._parte(), self._campo('valorAcaoProcesso'), self._movimentacoes('movimentacaoProcesso')]
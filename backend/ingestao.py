@@ -0,0 +1,77 @@
+import io
+import re
+
+from registros import Registro
+
+# Número CNJ de processos do TJSP (segmento 8, tribunal 26): NNNNNNN-DD.AAAA.8.26.OOOO
+PADRAO_PROCESSO = re.compile(r'([0-9]{7})-([0-9]{2})\.([0-9]{4})\.(8)\.(26)\.([0-9]{4})')
+
+MSG_DIGITO_INVALIDO = "Número de processo com dígito verificador inválido."
+
+
+def digito_verificador_valido(numero):
+    """Confere os dígitos verificadores do número CNJ (módulo 97, Resolução CNJ 65/2008)."""
+    correspondencia = PADRAO_PROCESSO.fullmatch(numero)
+    if not correspondencia:
+        return False
+    sequencial, digito, ano, segmento, tribunal, origem = correspondencia.groups()
+    return int(sequencial + ano + segmento + tribunal + origem + digito) % 97 == 1
+
+
+def encontra_processos(linhas):
+    """Gera os números de processo encontrados em cada linha de texto."""
+    for linha in linhas:
+        for correspondencia in PADRAO_PROCESSO.finditer(linha):
+            yield correspondencia.group(0)
+
+
+class ArquivoInvalido(Exception):
+    """O arquivo enviado não pôde ser lido."""
+
+
+def _linhas_planilha(arquivo):
+    from zipfile import BadZipFile
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+    try:
+        workbook = load_workbook(arquivo, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException, KeyError) as e:
+        # KeyError: um ZIP válido que não tem as partes de uma planilha
+        raise ArquivoInvalido("Arquivo XLSX inválido ou corrompido.") from e
+    try:
+        for planilha in workbook.worksheets:
+            for linha in planilha.iter_rows(values_only=True):
+                yield ' '.join(str(valor) for valor in linha if valor is not None)
+    finally:
+        workbook.close()
+
+
+def linhas_do_arquivo(arquivo, nome=''):
+    """Gera as linhas de texto de um arquivo TXT, CSV ou XLSX, sem carregá-lo inteiro na memória.
+
+    Uma planilha ilegível levanta ArquivoInvalido durante a leitura das linhas.
+    """
+    if nome.lower().endswith('.xlsx'):
+        return _linhas_planilha(arquivo)
+    # Os números são ASCII; a codificação real do arquivo não interfere na extração,
+    # e bytes inválidos são substituídos em vez de interromper a leitura
+    return io.TextIOWrapper(arquivo, encoding='utf-8', errors='replace', newline='')
+
+
+def preparar_lista(numeros):
+    """Remove os repetidos (mantendo a ordem) e separa os números com dígito verificador inválido.
+
+    Retorna a lista de processos e um dicionário {numero: Registro} com os inválidos,
+    que entram na tarefa já como erro, sem passar pelo eSAJ.
+    """
+    lista_consulta = []
+    invalidos = {}
+    vistos = set()
+    for numero in numeros:
+        if numero in vistos:
+            continue
+        vistos.add(numero)
+        lista_consulta.append(numero)
+        if not digito_verificador_valido(numero):
+            invalidos[numero] = Registro('erro', [numero, MSG_DIGITO_INVALIDO])
+    return lista_consulta, invalidos
@@ -0,0 +1,15 @@
+#!/bin/sh
+# Inicia o worker da fila de tarefas sob supervisão e a aplicação com Gunicorn.
+
+# Se o worker cair, ele é reiniciado; tarefas reservadas por ele são retomadas
+# quando a reserva expira
+(
+    while true; do
+        python worker.py
+        echo "worker encerrado (código $?); reiniciando em 5 s" >&2
+        sleep 5
+    done
+) &
+
+# Com --preload a aplicação é importada uma vez só, antes de criar os workers do Gunicorn
+exec gunicorn --preload --bind 0.0.0.0:8000 app:app
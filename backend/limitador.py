@@ -0,0 +1,75 @@
+import os
+import time
+import threading
+from urllib.parse import urlsplit
+
+from metricas import observar
+
+# Configurações do limitador, carregadas do ambiente
+TAXA_REQUISICOES = float(os.getenv("ESAJ_TAXA", "5"))  # requisições por segundo, por host
+RAJADA_REQUISICOES = float(os.getenv("ESAJ_RAJADA", "5"))
+TAXA_MINIMA = float(os.getenv("ESAJ_TAXA_MINIMA", "0.2"))
+FATOR_REDUCAO = 0.5  # Multiplica a taxa a cada falha (429, 5xx ou timeout)
+INCREMENTO_RECUPERACAO = 0.1  # Somado à taxa a cada sucesso, até voltar à taxa configurada
+
+
+class LimitadorTaxa:
+    """Balde de fichas com recuo adaptativo.
+
+    Cada requisição consome uma ficha; as fichas são repostas à taxa atual. A
+    taxa cai pela metade quando o servidor responde com 429, 5xx ou estoura o
+    tempo, e volta a subir aos poucos enquanto as respostas são bem-sucedidas.
+    """
+
+    def __init__(self, taxa=TAXA_REQUISICOES, rajada=RAJADA_REQUISICOES, taxa_minima=TAXA_MINIMA):
+        self.taxa_maxima = taxa
+        self.taxa = taxa
+        self.taxa_minima = min(taxa_minima, taxa)
+        self.capacidade = rajada
+        self._fichas = rajada
+        self._atualizado_em = time.monotonic()
+        self._pausado_ate = 0.0
+        self._lock = threading.Lock()
+
+    def _repor(self, agora):
+        self._fichas = min(self.capacidade, self._fichas + (agora - self._atualizado_em) * self.taxa)
+        self._atualizado_em = agora
+
+    def aguardar(self):
+        """Bloqueia até haver uma ficha disponível e a consome."""
+        with self._lock:
+            agora = time.monotonic()
+            self._repor(agora)
+            # A ficha é reservada agora; quem chegar depois espera a sua vez
+            self._fichas -= 1
+            espera = max(-self._fichas / self.taxa, self._pausado_ate - agora, 0.0)
+        if espera > 0:
+            time.sleep(espera)
+        observar('espera_limitador', espera)
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self._repor(time.monotonic())
+            self.taxa = min(self.taxa_maxima, self.taxa + INCREMENTO_RECUPERACAO)
+
+    def registrar_falha(self, retry_after=None):
+        """Reduz a taxa. `retry_after` (em segundos) pausa o host inteiro, como pede o cabeçalho Retry-After."""
+        with self._lock:
+            agora = time.monotonic()
+            self._repor(agora)
+            self.taxa = max(self.taxa_minima, self.taxa * FATOR_REDUCAO)
+            if retry_after:
+                self._pausado_ate = max(self._pausado_ate, agora + retry_after)
+
+
+_limitadores = {}
+_limitadores_lock = threading.Lock()
+
+
+def limitador_para(url):
+    """Retorna o limitador compartilhado do host da URL."""
+    host = urlsplit(url).netloc
+    with _limitadores_lock:
+        if host not in _limitadores:
+            _limitadores[host] = LimitadorTaxa()
+        return _limitadores[host]
@@ -0,0 +1,192 @@
+"""Métricas de desempenho das consultas: tempos por etapa e desfechos.
+
+Cada processo worker acumula as métricas na memória e grava periodicamente um
+instantâneo em DADOS_DIR/metricas; o servidor web soma os instantâneos e os
+expõe em /metrics no formato texto do Prometheus.
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from armazenamento import caminho
+
+DIRETORIO_METRICAS = 'metricas'
+VALIDADE_INSTANTANEO = int(os.getenv("METRICAS_VALIDADE", "600"))  # em segundos sem atualização do worker
+
+# Limites superiores (em segundos) das faixas dos histogramas
+FAIXAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+DESFECHOS = ('resultado_2_grau', 'resultado_1_grau', 'incidente', 'segredo', 'inconclusivo', 'erro', 'cache', 'compartilhado',
+             'sem_alteracao')
+
+_lock = threading.Lock()
+_histogramas = {}  # {etapa: {'faixas': [...], 'soma': s, 'contagem': n}}
+_desfechos = {}
+_local = threading.local()
+
+
+def observar(etapa, segundos):
+    with _lock:
+        histograma = _histogramas.get(etapa)
+        if histograma is None:
+            histograma = _histogramas[etapa] = {'faixas': [0] * len(FAIXAS), 'soma': 0.0, 'contagem': 0}
+        for i, limite in enumerate(FAIXAS):
+            if segundos <= limite:
+                histograma['faixas'][i] += 1
+                break
+        histograma['soma'] += segundos
+        histograma['contagem'] += 1
+        tempos = getattr(_local, 'tempos', None)
+        if tempos is not None:
+            total, contagem = tempos.get(etapa, (0.0, 0))
+            tempos[etapa] = (total + segundos, contagem + 1)
+
+
+@contextmanager
+def medir(etapa):
+    """Mede o tempo do bloco e o registra no histograma da etapa."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(etapa, time.perf_counter() - inicio)
+
+
+@contextmanager
+def coletar():
+    """Junta num dicionário {etapa: (segundos, contagem)} os tempos medidos pela thread dentro do bloco."""
+    anteriores = getattr(_local, 'tempos', None)
+    _local.tempos = tempos = {}
+    try:
+        yield tempos
+    finally:
+        _local.tempos = anteriores
+
+
+def coletado(funcao):
+    """Envolve `funcao`, executada em outra thread, para retornar (resultado, tempos) com a coleta só dela.
+
+    Quem disparou a execução soma os tempos à própria coleta com `acumular`, se
+    aproveitar o resultado; uma execução descartada não mexe na coleta de ninguém.
+    """
+    def executar(*args):
+        with coletar() as tempos:
+            resultado = funcao(*args)
+        return resultado, tempos
+
+    return executar
+
+
+def acumular(tempos):
+    """Soma à coleta da thread atual os tempos {etapa: (segundos, contagem)} coletados em outra thread."""
+    atuais = getattr(_local, 'tempos', None)
+    if atuais is None:
+        return
+    for etapa, (segundos, contagem) in tempos.items():
+        total, n = atuais.get(etapa, (0.0, 0))
+        atuais[etapa] = (total + segundos, n + contagem)
+
+
+def contar(desfecho):
+    with _lock:
+        _desfechos[desfecho] = _desfechos.get(desfecho, 0) + 1
+
+
+def instantaneo():
+    with _lock:
+        return {
+            'histogramas': {etapa: {**h, 'faixas': list(h['faixas'])} for etapa, h in _histogramas.items()},
+            'desfechos': dict(_desfechos),
+        }
+
+
+def salvar(nome):
+    """Grava o instantâneo das métricas deste processo, para o servidor web ler."""
+    diretorio = caminho(DIRETORIO_METRICAS)
+    os.makedirs(diretorio, exist_ok=True)
+    destino = os.path.join(diretorio, f'{nome}.json')
+    temporario = f'{destino}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(instantaneo(), arquivo)
+    os.replace(temporario, destino)
+
+
+def remover_antigos(idade_maxima):
+    """Apaga os instantâneos de workers que pararam de atualizá-los há mais de `idade_maxima` segundos."""
+    diretorio = caminho(DIRETORIO_METRICAS)
+    if not os.path.isdir(diretorio):
+        return
+    limite = time.time() - idade_maxima
+    for nome in os.listdir(diretorio):
+        arquivo = os.path.join(diretorio, nome)
+        try:
+            if os.path.getmtime(arquivo) < limite:
+                os.remove(arquivo)
+        except OSError:
+            pass
+
+
+def carregar():
+    """Soma os instantâneos dos workers ativos."""
+    total = {'histogramas': {}, 'desfechos': {}}
+    diretorio = caminho(DIRETORIO_METRICAS)
+    if not os.path.isdir(diretorio):
+        return total
+    limite = time.time() - VALIDADE_INSTANTANEO
+    for nome in os.listdir(diretorio):
+        if not nome.endswith('.json'):
+            continue
+        arquivo = os.path.join(diretorio, nome)
+        try:
+            if os.path.getmtime(arquivo) < limite:
+                continue
+            with open(arquivo, encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for etapa, h in dados['histogramas'].items():
+            soma = total['histogramas'].setdefault(etapa, {'faixas': [0] * len(FAIXAS), 'soma': 0.0, 'contagem': 0})
+            soma['faixas'] = [a + b for a, b in zip(soma['faixas'], h['faixas'])]
+            soma['soma'] += h['soma']
+            soma['contagem'] += h['contagem']
+        for desfecho, n in dados['desfechos'].items():
+            total['desfechos'][desfecho] = total['desfechos'].get(desfecho, 0) + n
+    return total
+
+
+def formatar_prometheus(metricas, fila):
+    """Monta o texto do endpoint /metrics."""
+    linhas = [
+        '# HELP pesquisa_etapa_segundos Tempo gasto em cada etapa da consulta de um processo.',
+        '# TYPE pesquisa_etapa_segundos histogram',
+    ]
+    for etapa, h in sorted(metricas['histogramas'].items()):
+        acumulado = 0
+        for limite, n in zip(FAIXAS, h['faixas']):
+            acumulado += n
+            linhas.append(f'pesquisa_etapa_segundos_bucket{{etapa="{etapa}",le="{limite}"}} {acumulado}')
+        linhas.append(f'pesquisa_etapa_segundos_bucket{{etapa="{etapa}",le="+Inf"}} {h["contagem"]}')
+        linhas.append(f'pesquisa_etapa_segundos_sum{{etapa="{etapa}"}} {h["soma"]}')
+        linhas.append(f'pesquisa_etapa_segundos_count{{etapa="{etapa}"}} {h["contagem"]}')
+
+    linhas += [
+        '# HELP pesquisa_processos_total Processos consultados, por desfecho.',
+        '# TYPE pesquisa_processos_total counter',
+    ]
+    for desfecho in DESFECHOS:
+        linhas.append(f'pesquisa_processos_total{{desfecho="{desfecho}"}} {metricas["desfechos"].get(desfecho, 0)}')
+
+    linhas += [
+        '# HELP pesquisa_fila_tarefas Tarefas ainda não concluídas, por status.',
+        '# TYPE pesquisa_fila_tarefas gauge',
+    ]
+    for status in ('iniciando', 'processando'):
+        linhas.append(f'pesquisa_fila_tarefas{{status="{status}"}} {fila["tarefas"].get(status, 0)}')
+    linhas += [
+        '# HELP pesquisa_fila_processos Processos ainda pendentes na fila.',
+        '# TYPE pesquisa_fila_processos gauge',
+        f'pesquisa_fila_processos {fila["processos"]}',
+    ]
+    return '\n'.join(linhas) + '\n'
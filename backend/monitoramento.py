@@ -0,0 +1,192 @@
+"""Acompanhamento de processos: reconsulta periódica e registro das alterações.
+
+Cada usuário cadastra os processos que quer acompanhar. O worker reconsulta
+cada processo a cada MONITORAMENTO_INTERVALO segundos (uma vez só, mesmo que
+vários usuários o acompanhem) e compara a impressão da tabela de movimentações
+com a da verificação anterior. Só os processos que mudaram geram um registro em
+`alteracoes`, com as movimentações novas e as que sumiram.
+"""
+import os
+import json
+import time
+import hashlib
+from contextlib import closing
+
+from armazenamento import conectar
+from registros import CELULAS_POR_MOVIMENTACAO
+
+# Configurações do monitoramento, carregadas do ambiente
+INTERVALO = int(os.getenv("MONITORAMENTO_INTERVALO", str(24 * 3600)))  # em segundos entre verificações de um processo
+TTL_ALTERACOES = int(os.getenv("MONITORAMENTO_TTL_ALTERACOES", str(30 * 24 * 3600)))  # em segundos
+DURACAO_RESERVA = 600  # em segundos para o worker concluir uma verificação antes de outro retomá-la
+LIMITE_ALTERACOES = 500  # Alterações por resposta de `obter_alteracoes`
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS acompanhamentos (
+    user_id TEXT NOT NULL,
+    numero TEXT NOT NULL,
+    criado_em REAL NOT NULL,
+    PRIMARY KEY (user_id, numero)
+);
+CREATE INDEX IF NOT EXISTS acompanhamentos_numero ON acompanhamentos (numero);
+CREATE TABLE IF NOT EXISTS processos (
+    numero TEXT PRIMARY KEY,
+    instancia INTEGER,
+    impressao TEXT,
+    movimentacoes TEXT,
+    categoria TEXT,
+    verificado_em REAL,
+    alterado_em REAL,
+    proxima_verificacao REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS processos_proxima_verificacao ON processos (proxima_verificacao);
+CREATE TABLE IF NOT EXISTS alteracoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    numero TEXT NOT NULL,
+    detectado_em REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alteracoes_numero ON alteracoes (numero, id);
+CREATE INDEX IF NOT EXISTS alteracoes_detectado_em ON alteracoes (detectado_em);
+"""
+
+
+def _conectar():
+    return conectar('monitoramento.sqlite3', ESQUEMA)
+
+
+def impressao(movimentacoes):
+    """Resumo da tabela de movimentações; muda sempre que uma movimentação entra, sai ou é alterada."""
+    return hashlib.sha1('\x1f'.join(movimentacoes).encode('utf-8')).hexdigest()
+
+
+def _linhas(movimentacoes):
+    """Agrupa as células em (data, descrição) de cada movimentação."""
+    n = CELULAS_POR_MOVIMENTACAO
+    return [(celulas[0], celulas[2]) for celulas in (movimentacoes[i:i + n] for i in range(0, len(movimentacoes), n))
+            if len(celulas) == n]
+
+
+def diferencas(anteriores, atuais):
+    """Retorna as movimentações novas e as que deixaram de aparecer."""
+    linhas_anteriores, linhas_atuais = _linhas(anteriores), _linhas(atuais)
+    vistas, presentes = set(linhas_anteriores), set(linhas_atuais)
+    return ([list(l) for l in linhas_atuais if l not in vistas],
+            [list(l) for l in linhas_anteriores if l not in presentes])
+
+
+def acompanhar(user_id, numeros):
+    """Inclui os processos no acompanhamento do usuário e retorna quantos eram novos."""
+    agora = time.time()
+    with closing(_conectar()) as conexao, conexao:
+        antes = conexao.total_changes
+        conexao.executemany('INSERT OR IGNORE INTO acompanhamentos (user_id, numero, criado_em) VALUES (?, ?, ?)',
+                            [(user_id, numero, agora) for numero in numeros])
+        novos = conexao.total_changes - antes
+        # Processos ainda não monitorados entram na fila para a primeira verificação
+        conexao.executemany('INSERT OR IGNORE INTO processos (numero, proxima_verificacao) VALUES (?, 0)',
+                            [(numero,) for numero in numeros])
+    return novos
+
+
+def deixar_de_acompanhar(user_id, numero):
+    """Remove o processo do acompanhamento do usuário. Retorna False se ele não era acompanhado."""
+    with closing(_conectar()) as conexao, conexao:
+        removido = conexao.execute('DELETE FROM acompanhamentos WHERE user_id = ? AND numero = ?', (user_id, numero)).rowcount
+        if removido and not conexao.execute('SELECT 1 FROM acompanhamentos WHERE numero = ? LIMIT 1', (numero,)).fetchone():
+            # Ninguém mais acompanha o processo: ele sai do monitoramento
+            conexao.execute('DELETE FROM processos WHERE numero = ?', (numero,))
+            conexao.execute('DELETE FROM alteracoes WHERE numero = ?', (numero,))
+    return bool(removido)
+
+
+def listar(user_id):
+    """Retorna os processos acompanhados pelo usuário e a situação do monitoramento de cada um."""
+    with closing(_conectar()) as conexao:
+        linhas = conexao.execute(
+            'SELECT a.numero, a.criado_em, p.categoria, p.verificado_em, p.alterado_em FROM acompanhamentos a'
+            ' LEFT JOIN processos p ON p.numero = a.numero WHERE a.user_id = ? ORDER BY a.criado_em, a.numero',
+            (user_id,)).fetchall()
+    return [{'numero': numero, 'acompanhado_desde': criado_em, 'categoria': categoria,
+             'verificado_em': verificado_em, 'alterado_em': alterado_em}
+            for numero, criado_em, categoria, verificado_em, alterado_em in linhas]
+
+
+def obter_alteracoes(user_id, cursor=0, limite=LIMITE_ALTERACOES):
+    """Retorna as alterações dos processos do usuário depois do `cursor`, já serializadas, e o novo cursor.
+
+    Só entram as alterações detectadas depois que o usuário passou a acompanhar o processo.
+    """
+    with closing(_conectar()) as conexao:
+        linhas = conexao.execute(
+            'SELECT al.id, al.payload FROM alteracoes al'
+            ' JOIN acompanhamentos a ON a.numero = al.numero AND a.user_id = ? AND al.detectado_em >= a.criado_em'
+            ' WHERE al.id > ? ORDER BY al.id LIMIT ?', (user_id, cursor, limite)).fetchall()
+    return [payload for _, payload in linhas], (linhas[-1][0] if linhas else cursor)
+
+
+def reservar_vencidos(limite):
+    """Reserva para este worker os processos com verificação vencida.
+
+    Retorna [(numero, instancia, impressao), ...]. A reserva adia a próxima
+    verificação por DURACAO_RESERVA segundos, para que outro worker a retome se
+    esta não for concluída.
+    """
+    agora = time.time()
+    with closing(_conectar()) as conexao:
+        conexao.isolation_level = None
+        conexao.execute('BEGIN IMMEDIATE')
+        try:
+            vencidos = conexao.execute(
+                'SELECT numero, instancia, impressao FROM processos WHERE proxima_verificacao <= ?'
+                ' ORDER BY proxima_verificacao LIMIT ?', (agora, limite)).fetchall()
+            conexao.executemany('UPDATE processos SET proxima_verificacao = ? WHERE numero = ?',
+                                [(agora + DURACAO_RESERVA, numero) for numero, _, _ in vencidos])
+            conexao.execute('COMMIT')
+        except BaseException:
+            conexao.execute('ROLLBACK')
+            raise
+    return vencidos
+
+
+def registrar_sem_alteracao(numero):
+    agora = time.time()
+    with closing(_conectar()) as conexao, conexao:
+        conexao.execute('UPDATE processos SET verificado_em = ?, proxima_verificacao = ? WHERE numero = ?',
+                        (agora, agora + INTERVALO, numero))
+
+
+def registrar_verificacao(numero, instancia, categoria, dados, linha):
+    """Grava o resultado de uma verificação completa e, se o processo mudou, a alteração.
+
+    `linha` é o registro formatado para o usuário. A primeira verificação só
+    guarda a referência para as próximas comparações.
+    """
+    movimentacoes = dados[8] if categoria == 'resultado' else []
+    atual = impressao(movimentacoes)
+    agora = time.time()
+    with closing(_conectar()) as conexao, conexao:
+        anterior = conexao.execute(
+            'SELECT instancia, impressao, movimentacoes, categoria, verificado_em FROM processos WHERE numero = ?',
+            (numero,)).fetchone()
+        if anterior is None:
+            return  # Deixou de ser acompanhado durante a verificação
+        instancia_anterior, impressao_anterior, movimentacoes_anteriores, categoria_anterior, verificado_em = anterior
+        alterado = verificado_em is not None and (atual != impressao_anterior or categoria != categoria_anterior)
+        if alterado:
+            novas, removidas = diferencas(json.loads(movimentacoes_anteriores or '[]'), movimentacoes)
+            payload = json.dumps({'numero': numero, 'detectado_em': agora, 'categoria': categoria,
+                                  'categoria_anterior': categoria_anterior, 'instancia': instancia,
+                                  'instancia_anterior': instancia_anterior, 'linha': linha,
+                                  'novas': novas, 'removidas': removidas}, ensure_ascii=False)
+            conexao.execute('INSERT INTO alteracoes (numero, detectado_em, payload) VALUES (?, ?, ?)', (numero, agora, payload))
+        conexao.execute(
+            'UPDATE processos SET instancia = ?, impressao = ?, movimentacoes = ?, categoria = ?, verificado_em = ?,'
+            ' alterado_em = CASE WHEN ? THEN ? ELSE alterado_em END, proxima_verificacao = ? WHERE numero = ?',
+            (instancia, atual, json.dumps(movimentacoes, ensure_ascii=False), categoria, agora,
+             alterado, agora, agora + INTERVALO, numero))
+
+
+def limpar_alteracoes_antigas():
+    with closing(_conectar()) as conexao, conexao:
+        conexao.execute('DELETE FROM alteracoes WHERE detectado_em <= ?', (time.time() - TTL_ALTERACOES,))
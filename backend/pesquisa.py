@@ -0,0 +1,290 @@
+import copy
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metricas
+import roteamento
+import monitoramento
+import registros
+import cache_processos
+from coalescencia import Coalescedor
+from extrator import Pagina
+from pool_navegadores import obter_pool, PoolEsgotado
+from cliente_esaj import BASE_URL, MAX_CONEXOES, consultar_processo_1_grau
+from limitador import limitador_para
+from consulta_2_grau import consultar_processo_2_grau_http, PaginaNaoSuportada
+
+logger = logging.getLogger(__name__)
+
+# Consultas simultâneas ao mesmo processo, vindas de qualquer tarefa, viram uma só ida ao eSAJ
+_coalescedor = Coalescedor()
+
+
+def consulta_processo_compartilhada(n_processo):
+    """Consulta o processo, reaproveitando uma consulta ao mesmo número que já esteja em andamento.
+
+    Cada tarefa recebe sua própria cópia do resultado e o grava separadamente.
+    """
+    executou = False
+
+    def consultar(n_processo):
+        nonlocal executou
+        executou = True
+        return consulta_processo_com_cache(n_processo)
+
+    categoria, dados = _coalescedor.executar(n_processo, consultar, n_processo)
+    if not executou:
+        metricas.contar('compartilhado')
+    return categoria, copy.deepcopy(dados)
+
+
+def consulta_processo_com_cache(n_processo):
+    """Consulta um processo e guarda o resultado no cache. Falhas transitórias não são guardadas."""
+    # Outra tarefa pode ter consultado o processo depois que esta foi criada
+    em_cache = cache_processos.obter(n_processo)
+    if em_cache:
+        metricas.contar('cache')
+        return em_cache
+    try:
+        categoria, dados = consulta_processo(n_processo)
+    except PoolEsgotado:
+        metricas.contar('erro')
+        return 'erro', [n_processo, "Nenhum navegador disponível. Tente novamente mais tarde."]
+    except Exception:
+        logger.exception('Falha ao consultar o processo %s', n_processo)
+        metricas.contar('erro')
+        return 'erro', [n_processo, "Erro inesperado durante o processamento."]
+    cache_processos.guardar(n_processo, categoria, dados)
+    return categoria, dados
+
+
+def consulta_processo(n_processo):
+    """Consulta um processo e retorna a categoria ('resultado', 'erro' ou 'inconclusivo') e a linha correspondente."""
+    categoria, dados, desfecho = _consulta_processo(n_processo)
+    metricas.contar(desfecho)
+    return registros.compactar(categoria, dados)
+
+
+# Desfechos do 1º grau que dispensam a consulta ao 2º grau
+DESFECHOS_DEFINITIVOS_1_GRAU = ('resultado_1_grau', 'incidente', 'segredo')
+
+# Consultas das duas instâncias ao mesmo tempo, no modo de roteamento 'paralelo'
+_sondagens = ThreadPoolExecutor(max_workers=2 * MAX_CONEXOES, thread_name_prefix='sondagem')
+
+
+def _pagina_2_grau(n_processo):
+    try:
+        with metricas.medir('consulta_2_grau'):
+            return consultar_processo_2_grau_http(n_processo)
+    except PaginaNaoSuportada:
+        # O navegador só é usado quando a página exige JavaScript
+        with metricas.medir('consulta_2_grau_navegador'), obter_pool().navegador() as driver:
+            return Pagina(consultar_processo_2_grau(driver, n_processo))
+
+
+def _pagina_1_grau(n_processo):
+    with metricas.medir('consulta_1_grau'):
+        return consultar_processo_1_grau(n_processo)
+
+
+def _avaliar_2_grau(pagina_2_grau):
+    """Retorna (categoria, dados, desfecho) se a página traz o processo, ou None."""
+    dados_2_grau = pagina_2_grau.dados_2_grau()
+    if dados_2_grau and dados_2_grau[0] != 'Não disponível':
+        return 'resultado', dados_2_grau, 'resultado_2_grau'
+    return None
+
+
+def _avaliar_1_grau(pagina_1_grau, n_processo):
+    """Retorna (categoria, dados, desfecho) da página do 1º grau, mesmo quando o processo não é encontrado."""
+    if pagina_1_grau.segredo_de_justica():
+        return 'erro', [n_processo, "Processo em segredo de justiça."], 'segredo'
+
+    dados_1_grau = pagina_1_grau.dados_1_grau()
+    if dados_1_grau:
+        return 'resultado', dados_1_grau, 'resultado_1_grau'
+
+    dados_incidente = pagina_1_grau.dados_1_grau_incidente(n_processo)
+    if dados_incidente:
+        return 'resultado', dados_incidente, 'incidente'
+
+    paginacao = pagina_1_grau.paginacao()
+    if paginacao:
+        return 'inconclusivo', [n_processo, paginacao], 'inconclusivo'
+
+    msg_retorno = pagina_1_grau.mensagem_retorno()
+    if msg_retorno:
+        return 'erro', [n_processo, msg_retorno], 'erro'
+
+    return 'erro', [n_processo, "Não foi possível extrair os dados."], 'erro'
+
+
+def _sondar_2_grau(n_processo):
+    return _avaliar_2_grau(_pagina_2_grau(n_processo))
+
+
+def _sondar_1_grau(n_processo):
+    return _avaliar_1_grau(_pagina_1_grau(n_processo), n_processo)
+
+
+def _consulta_processo(n_processo):
+    """Faz a consulta e retorna também o desfecho contado nas métricas.
+
+    As instâncias são consultadas na ordem escolhida pelo roteamento. Se nenhuma
+    encontrar o processo, vale a resposta do 1º grau (inconclusivo ou a mensagem do eSAJ).
+    """
+    if roteamento.MODO == 'paralelo':
+        return _consulta_paralela(n_processo)
+
+    resposta_1_grau = None
+    for instancia in roteamento.ordem(n_processo):
+        if instancia == roteamento.SEGUNDO_GRAU:
+            resposta_2_grau = _sondar_2_grau(n_processo)
+            if resposta_2_grau:
+                roteamento.registrar(n_processo, roteamento.SEGUNDO_GRAU)
+                return resposta_2_grau
+        else:
+            resposta_1_grau = _sondar_1_grau(n_processo)
+            if resposta_1_grau[2] in DESFECHOS_DEFINITIVOS_1_GRAU:
+                roteamento.registrar(n_processo, roteamento.PRIMEIRO_GRAU)
+                return resposta_1_grau
+    return resposta_1_grau
+
+
+def _consulta_paralela(n_processo):
+    """Consulta as duas instâncias ao mesmo tempo e fica com a primeira que encontrar o processo."""
+    futuros = {
+        _sondagens.submit(metricas.coletado(_sondar_2_grau), n_processo): roteamento.SEGUNDO_GRAU,
+        _sondagens.submit(metricas.coletado(_sondar_1_grau), n_processo): roteamento.PRIMEIRO_GRAU,
+    }
+    resposta_1_grau = falha = None
+    for futuro in as_completed(futuros):
+        instancia = futuros[futuro]
+        try:
+            resposta, tempos = futuro.result()
+        except Exception as e:
+            falha = e
+            continue
+        # Só entram nos tempos da tarefa as consultas já concluídas; a que ainda
+        # estiver em andamento segue com a própria coleta e é descartada
+        metricas.acumular(tempos)
+        if instancia == roteamento.PRIMEIRO_GRAU:
+            resposta_1_grau = resposta
+            encontrado = resposta[2] in DESFECHOS_DEFINITIVOS_1_GRAU
+        else:
+            encontrado = resposta is not None
+        if encontrado:
+            roteamento.registrar(n_processo, instancia)
+            return resposta
+    if resposta_1_grau is None:
+        raise falha
+    return resposta_1_grau
+
+
+def instancia_do_desfecho(desfecho):
+    """Instância em que o processo foi encontrado, ou None se não foi encontrado em nenhuma."""
+    if desfecho == 'resultado_2_grau':
+        return roteamento.SEGUNDO_GRAU
+    if desfecho in DESFECHOS_DEFINITIVOS_1_GRAU:
+        return roteamento.PRIMEIRO_GRAU
+    return None
+
+
+def verificar_processo(n_processo, instancia=None, impressao_anterior=None):
+    """Reconsulta um processo acompanhado, sem passar pelo cache.
+
+    Com a instância já conhecida, só ela é consultada; se a impressão das
+    movimentações for igual a `impressao_anterior`, a verificação para ali, sem
+    extrair o restante da página, e retorna None. Um processo encontrado no 1º
+    grau continua lá mesmo depois de subir em recurso, então o 2º grau também é
+    consultado a cada verificação; se o processo aparecer lá, passa a ser
+    acompanhado pelo 2º grau. Caso contrário retorna (instancia, categoria,
+    dados), e o resultado também atualiza o cache.
+    """
+    resposta = None
+    if instancia == roteamento.SEGUNDO_GRAU:
+        pagina = _pagina_2_grau(n_processo)
+        if _sem_alteracao(pagina, impressao_anterior):
+            return None
+        resposta = _avaliar_2_grau(pagina)
+    elif instancia == roteamento.PRIMEIRO_GRAU:
+        resposta = _sondar_2_grau(n_processo)
+        if resposta is None:
+            pagina = _pagina_1_grau(n_processo)
+            if _sem_alteracao(pagina, impressao_anterior):
+                return None
+            resposta = _avaliar_1_grau(pagina, n_processo)
+            if resposta[2] not in DESFECHOS_DEFINITIVOS_1_GRAU:
+                resposta = None
+    if resposta is None:
+        # Primeira verificação, ou o processo não está mais onde estava
+        resposta = _consulta_processo(n_processo)
+    categoria, dados, desfecho = resposta
+    metricas.contar(desfecho)
+    categoria, dados = registros.compactar(categoria, dados)
+    cache_processos.guardar(n_processo, categoria, dados)
+    return instancia_do_desfecho(desfecho), categoria, dados
+
+
+def _sem_alteracao(pagina, impressao_anterior):
+    """Diz se a tabela de movimentações da página tem a mesma impressão da verificação anterior."""
+    movimentacoes = registros.limitar_movimentacoes(pagina.movimentacoes())
+    if impressao_anterior is not None and monitoramento.impressao(movimentacoes) == impressao_anterior:
+        metricas.contar('sem_alteracao')
+        return True
+    return False
+
+
+# O selenium só é importado quando uma consulta precisa do navegador
+@functools.cache
+def _pagina_pronta():
+    """Condição satisfeita por qualquer elemento que indique que uma página do cposg terminou de carregar."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    return EC.any_of(
+        EC.presence_of_element_located((By.ID, 'numeroProcesso')),
+        EC.presence_of_element_located((By.ID, 'listagemDeProcessos')),
+        EC.presence_of_element_located((By.ID, 'mensagemRetorno')),
+        EC.presence_of_element_located((By.CLASS_NAME, 'resultadoPaginacao')),
+        EC.presence_of_element_located((By.CLASS_NAME, 'modal-body')))
+
+
+def navegar(driver, url):
+    """Abre a URL no navegador, passando pelo limitador do host, e espera a página ficar pronta."""
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+    limitador = limitador_para(url)
+    limitador.aguardar()
+    driver.get(url)
+    try:
+        WebDriverWait(driver, 10).until(_pagina_pronta())
+        limitador.registrar_sucesso()
+    except TimeoutException:
+        limitador.registrar_falha()
+
+
+def consultar_processo_2_grau(driver, numero_processo):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+    url = f"{BASE_URL}/cposg/search.do?conversationId=&paginaConsulta=0&cbPesquisa=NUMPROC&numeroDigitoAnoUnificado={numero_processo[:15]}&foroNumeroUnificado={numero_processo[-4:]}&dePesquisaNuUnificado={numero_processo}&dePesquisa=&tipoNuProcesso=UNIFICADO"
+    navegar(driver, url)
+    pagina = Pagina(driver.page_source)
+    if pagina.tem('listagemDeProcessos'):
+        href = pagina.link_processo(numero_processo)
+        if href:
+            navegar(driver, f"{BASE_URL}{href}")
+        return driver.page_source
+    try:
+        WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.CLASS_NAME, "modal-body")))
+        WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.NAME, "processoSelecionado"))).click()
+        botao = WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.ID, "botaoEnviarIncidente")))
+        limitador_para(driver.current_url).aguardar()
+        botao.click()
+        WebDriverWait(driver, 10).until(EC.staleness_of(botao))
+        WebDriverWait(driver, 10).until(_pagina_pronta())
+    except TimeoutException:
+        pass
+    return driver.page_source
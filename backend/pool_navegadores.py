@@ -0,0 +1,159 @@
+import os
+import time
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+
+# Só as exceções são importadas aqui; o restante do selenium e o webdriver_manager
+# ficam para quando o primeiro navegador for aberto
+from selenium.common.exceptions import WebDriverException
+
+from metricas import medir
+
+# Configurações do pool, carregadas do ambiente
+TAMANHO_POOL = int(os.getenv("POOL_NAVEGADORES_TAMANHO", "3"))
+MAX_USOS_POR_NAVEGADOR = int(os.getenv("POOL_NAVEGADORES_MAX_USOS", "200"))
+IDADE_MAXIMA_NAVEGADOR = int(os.getenv("POOL_NAVEGADORES_IDADE_MAXIMA", "1800"))  # em segundos
+TIMEOUT_ESPERA_NAVEGADOR = int(os.getenv("POOL_NAVEGADORES_TIMEOUT", "300"))  # em segundos
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")  # Fixado na imagem Docker; sem ele, o webdriver_manager resolve a versão
+
+_chromedriver = None
+_chromedriver_lock = threading.Lock()
+
+
+def caminho_chromedriver():
+    """Retorna o caminho do chromedriver, resolvido uma única vez por processo.
+
+    Com CHROMEDRIVER_PATH não há acesso à rede; sem ele, o webdriver_manager
+    confere a versão do Chrome e baixa o driver se preciso.
+    """
+    global _chromedriver
+    with _chromedriver_lock:
+        if _chromedriver is None:
+            if CHROMEDRIVER_PATH:
+                _chromedriver = CHROMEDRIVER_PATH
+            else:
+                from webdriver_manager.chrome import ChromeDriverManager
+                _chromedriver = ChromeDriverManager().install()
+        return _chromedriver
+
+
+class PoolEsgotado(Exception):
+    """Nenhum navegador ficou livre dentro do tempo de espera."""
+
+
+class _Navegador:
+    """Um driver do Chrome e os dados usados para decidir quando reciclá-lo."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.usos = 0
+        self.criado_em = time.monotonic()
+
+    def expirado(self, max_usos, idade_maxima):
+        return self.usos >= max_usos or time.monotonic() - self.criado_em >= idade_maxima
+
+
+class PoolNavegadores:
+    """Pool limitado de navegadores headless, compartilhado por todas as tarefas.
+
+    Os navegadores ficam aquecidos entre consultas. Quem pede um navegador com o
+    pool esgotado espera até `timeout` segundos (contrapressão). Navegadores que
+    travam são descartados, e os que atingem o limite de usos ou de idade são
+    reciclados para conter o vazamento de memória do Chrome.
+    """
+
+    def __init__(self, tamanho=TAMANHO_POOL, max_usos=MAX_USOS_POR_NAVEGADOR, idade_maxima=IDADE_MAXIMA_NAVEGADOR):
+        self.tamanho = tamanho
+        self.max_usos = max_usos
+        self.idade_maxima = idade_maxima
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self._livres = queue.LifoQueue()
+
+    def _opcoes(self):
+        from selenium import webdriver
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        return options
+
+    def _criar(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        # Cada navegador tem o seu chromedriver (processo e porta próprios), para
+        # que encerrar um deles não derrube as sessões dos outros
+        service = ChromeService(caminho_chromedriver())
+        with medir('inicio_navegador'):
+            return _Navegador(webdriver.Chrome(service=service, options=self._opcoes()))
+
+    def _descartar(self, navegador):
+        try:
+            navegador.driver.quit()
+        except Exception:
+            pass
+
+    def _obter_livre(self):
+        """Retorna um navegador aquecido e saudável, ou cria um novo."""
+        while True:
+            try:
+                navegador = self._livres.get_nowait()
+            except queue.Empty:
+                return self._criar()
+            if navegador.expirado(self.max_usos, self.idade_maxima):
+                self._descartar(navegador)
+                continue
+            try:
+                navegador.driver.current_url  # Verifica se o navegador ainda responde
+                return navegador
+            except WebDriverException:
+                self._descartar(navegador)
+
+    @contextmanager
+    def navegador(self, timeout=TIMEOUT_ESPERA_NAVEGADOR):
+        """Empresta um driver do pool durante o bloco `with`."""
+        with medir('espera_navegador'):
+            vaga = self._vagas.acquire(timeout=timeout)
+        if not vaga:
+            raise PoolEsgotado("Nenhum navegador disponível no momento.")
+        navegador = None
+        try:
+            navegador = self._obter_livre()
+            yield navegador.driver
+        except WebDriverException:
+            # O navegador travou ou perdeu a sessão: não volta para o pool
+            if navegador:
+                self._descartar(navegador)
+                navegador = None
+            raise
+        finally:
+            if navegador:
+                navegador.usos += 1
+                if navegador.expirado(self.max_usos, self.idade_maxima):
+                    self._descartar(navegador)
+                else:
+                    self._livres.put(navegador)
+            self._vagas.release()
+
+    def encerrar(self):
+        """Fecha todos os navegadores ociosos."""
+        while True:
+            try:
+                self._descartar(self._livres.get_nowait())
+            except queue.Empty:
+                return
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool():
+    """Retorna o pool compartilhado do processo, criando-o no primeiro uso."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PoolNavegadores()
+            atexit.register(_pool.encerrar)
+        return _pool
@@ -0,0 +1,52 @@
+"""Registro compacto de um processo consultado.
+
+A linha extraída do eSAJ traz, no último campo, todas as células da tabela de
+movimentações, mas a API e as exportações só usam a data e a descrição da
+última movimentação. O `Registro` guarda apenas as colunas servidas, e o
+histórico de movimentações guardado no cache e no monitoramento é limitado
+às MAX_MOVIMENTACOES mais recentes.
+"""
+import os
+
+MAX_MOVIMENTACOES = int(os.getenv("REGISTROS_MAX_MOVIMENTACOES", "10"))
+CELULAS_POR_MOVIMENTACAO = 3  # Data, ícone e descrição
+
+COLUNAS_RESULTADOS = ['Número do Processo', 'Foro e Vara / Órgão Julgador', 'Juiz / Relator', 'Classe', 'Assunto', 'Situação', 'Partes e Advogados', 'Valor', 'Data', 'Movimento']
+COLUNAS_ERROS = ['Número do processo', 'Informação']
+COLUNAS_INCONCLUSIVOS = ['Número do processo', 'Observações']
+
+
+def limitar_movimentacoes(movimentacoes):
+    """Mantém só as células das movimentações mais recentes (a tabela vem da mais nova para a mais antiga)."""
+    # A primeira movimentação é sempre mantida, pois é servida nas colunas Data e Movimento
+    return movimentacoes[:max(MAX_MOVIMENTACOES, 1) * CELULAS_POR_MOVIMENTACAO]
+
+
+def compactar(categoria, dados):
+    """Retorna a linha extraída com o histórico de movimentações limitado."""
+    if categoria == 'resultado' and len(dados[8]) > max(MAX_MOVIMENTACOES, 1) * CELULAS_POR_MOVIMENTACAO:
+        return categoria, list(dados[:8]) + [limitar_movimentacoes(dados[8])]
+    return categoria, dados
+
+
+class Registro:
+    """Colunas servidas de um processo (resultado, erro ou inconclusivo), sem o restante da linha extraída."""
+
+    __slots__ = ('categoria', 'valores')
+
+    def __init__(self, categoria, dados):
+        self.categoria = categoria
+        if categoria == 'resultado':
+            movs = dados[8]
+            self.valores = (*dados[:8], movs[0] if len(movs) > 0 else None, movs[2] if len(movs) > 2 else None)
+        else:
+            self.valores = tuple(dados)
+
+    def colunas(self):
+        if self.categoria == 'resultado':
+            return COLUNAS_RESULTADOS
+        return COLUNAS_ERROS if self.categoria == 'erro' else COLUNAS_INCONCLUSIVOS
+
+    def linha(self):
+        """Registro servido pela API e pelas exportações."""
+        return dict(zip(self.colunas(), self.valores))
@@ -0,0 +1,78 @@
+"""Escolhe em que instância (1º ou 2º grau) procurar cada processo primeiro.
+
+No modo 'fixo' (padrão) o 2º grau é sempre consultado primeiro, como no fluxo
+original. No modo 'aprendido' a escolha usa o foro de origem do número CNJ (os
+quatro últimos dígitos) e as estatísticas de acertos de cada foro, guardadas em
+SQLite e atualizadas a cada consulta. Processos originários do tribunal (foro
+0000) vão direto ao 2º grau.
+
+Um processo em grau de recurso continua no 1º grau. Quando o 1º grau é
+consultado primeiro e encontra o processo, o 2º grau não é consultado, e o
+registro devolvido é o do 1º grau, com as movimentações de lá e sem o relator.
+Por isso os modos 'aprendido' e 'paralelo' são opcionais.
+"""
+import os
+import random
+from contextlib import closing
+
+from armazenamento import conectar
+
+# Configurações do roteamento, carregadas do ambiente
+MODO = os.getenv("ROTEAMENTO_MODO", "fixo")  # 'fixo' (sempre 2º grau primeiro), 'aprendido' ou 'paralelo'
+AMOSTRA_MINIMA = int(os.getenv("ROTEAMENTO_AMOSTRA_MINIMA", "20"))  # acertos do foro antes de confiar nas estatísticas
+EXPLORACAO = float(os.getenv("ROTEAMENTO_EXPLORACAO", "0.05"))  # fração das consultas que invertem a ordem preferida
+
+PRIMEIRO_GRAU = 1
+SEGUNDO_GRAU = 2
+FORO_TRIBUNAL = '0000'  # Processos de competência originária do tribunal
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS acertos (
+    foro TEXT PRIMARY KEY,
+    primeiro_grau INTEGER NOT NULL DEFAULT 0,
+    segundo_grau INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def _conectar():
+    return conectar('roteamento.sqlite3', ESQUEMA)
+
+
+def foro(numero):
+    return numero[-4:]
+
+
+def acertos(numero):
+    """Retorna quantos processos do foro foram encontrados no 1º e no 2º grau."""
+    with closing(_conectar()) as conexao:
+        linha = conexao.execute('SELECT primeiro_grau, segundo_grau FROM acertos WHERE foro = ?', (foro(numero),)).fetchone()
+    return linha or (0, 0)
+
+
+def ordem(numero):
+    """Retorna as instâncias na ordem em que devem ser consultadas."""
+    if MODO == 'fixo' or foro(numero) == FORO_TRIBUNAL:
+        return SEGUNDO_GRAU, PRIMEIRO_GRAU
+    primeiro_grau, segundo_grau = acertos(numero)
+    if primeiro_grau + segundo_grau < AMOSTRA_MINIMA or segundo_grau >= primeiro_grau:
+        # Sem dados suficientes, mantém a ordem original: 2º grau primeiro
+        preferida = SEGUNDO_GRAU, PRIMEIRO_GRAU
+    else:
+        preferida = PRIMEIRO_GRAU, SEGUNDO_GRAU
+    # De vez em quando inverte a ordem, para as estatísticas continuarem vendo as duas instâncias
+    if random.random() < EXPLORACAO:
+        return preferida[::-1]
+    return preferida
+
+
+def registrar(numero, instancia):
+    """Conta um acerto da instância em que o processo foi encontrado."""
+    if MODO == 'fixo':
+        # As estatísticas não são usadas, e ficariam enviesadas pelo 2º grau consultado sempre primeiro
+        return
+    coluna = 'primeiro_grau' if instancia == PRIMEIRO_GRAU else 'segundo_grau'
+    with closing(_conectar()) as conexao, conexao:
+        conexao.execute(
+            f'INSERT INTO acertos (foro, {coluna}) VALUES (?, 1)'
+            f' ON CONFLICT (foro) DO UPDATE SET {coluna} = {coluna} + 1', (foro(numero),))
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from armazenamento import conectar
+from registros import Registro
+
+# Configurações da fila de tarefas, carregadas do ambiente
+TAREFAS_TTL = int(os.getenv("TAREFAS_TTL", str(24 * 3600)))  # em segundos, contados a partir da conclusão
+DURACAO_RESERVA = int(os.getenv("TAREFAS_DURACAO_RESERVA", "600"))  # em segundos sem sinal de vida do worker
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tarefas (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    concluidos INTEGER NOT NULL DEFAULT 0,
+    criado_em REAL NOT NULL,
+    timestamp_conclusao TEXT,
+    expira_em REAL,
+    trabalhador TEXT,
+    reservado_ate REAL
+);
+CREATE INDEX IF NOT EXISTS tarefas_status ON tarefas (status, criado_em);
+CREATE INDEX IF NOT EXISTS tarefas_expira_em ON tarefas (expira_em);
+CREATE TABLE IF NOT EXISTS itens (
+    tarefa_id TEXT NOT NULL,
+    indice INTEGER NOT NULL,
+    numero TEXT NOT NULL,
+    categoria TEXT,
+    ordem INTEGER,
+    payload TEXT,
+    PRIMARY KEY (tarefa_id, indice)
+);
+CREATE INDEX IF NOT EXISTS itens_ordem ON itens (tarefa_id, ordem);
+CREATE TABLE IF NOT EXISTS tempos (
+    tarefa_id TEXT NOT NULL,
+    etapa TEXT NOT NULL,
+    segundos REAL NOT NULL,
+    contagem INTEGER NOT NULL,
+    PRIMARY KEY (tarefa_id, etapa)
+);
+"""
+
+CATEGORIAS = ('resultado', 'erro', 'inconclusivo')
+LIMITE_ITENS = 1000  # Itens por resposta de `obter_itens`
+
+
+def _conectar():
+    return conectar('tarefas.sqlite3', ESQUEMA)
+
+
+def _agora_texto():
+    return datetime.now(ZoneInfo("America/Sao_Paulo")).isoformat()
+
+
+def formatar_linha(categoria, dados):
+    """Converte a linha extraída no registro servido pela API e pelas exportações."""
+    return Registro(categoria, dados).linha()
+
+
+def _serializar(registro):
+    # Cada item é serializado uma única vez, quando fica pronto
+    return json.dumps({'categoria': registro.categoria, 'linha': registro.linha()}, ensure_ascii=False)
+
+
+def criar_tarefa(user_id, lista_consulta, resolvidos=None):
+    """Cria a tarefa e enfileira seus processos.
+
+    Os processos em `resolvidos` ({numero: Registro}, vindos do cache ou
+    rejeitados na validação) já entram concluídos.
+    """
+    resolvidos = resolvidos or {}
+    task_id = str(uuid.uuid4())
+    itens = []
+    concluidos = 0
+    for indice, n_processo in enumerate(lista_consulta):
+        if n_processo in resolvidos:
+            concluidos += 1
+            registro = resolvidos[n_processo]
+            itens.append((task_id, indice, n_processo, registro.categoria, concluidos, _serializar(registro)))
+        else:
+            itens.append((task_id, indice, n_processo, None, None, None))
+    pendente = concluidos < len(itens)
+
+    with closing(_conectar()) as conexao, conexao:
+        conexao.execute(
+            'INSERT INTO tarefas (id, user_id, status, total, concluidos, criado_em, timestamp_conclusao, expira_em)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (task_id, user_id, 'iniciando' if pendente else 'concluido', len(itens), concluidos, time.time(),
+             None if pendente else _agora_texto(), None if pendente else time.time() + TAREFAS_TTL))
+        conexao.executemany('INSERT INTO itens (tarefa_id, indice, numero, categoria, ordem, payload) VALUES (?, ?, ?, ?, ?, ?)', itens)
+    return task_id
+
+
+def obter_tarefa(task_id):
+    """Retorna o estado da tarefa, ou None se ela não existir ou já tiver expirado."""
+    with closing(_conectar()) as conexao:
+        linha = conexao.execute(
+            'SELECT user_id, status, total, concluidos, timestamp_conclusao FROM tarefas'
+            ' WHERE id = ? AND (expira_em IS NULL OR expira_em > ?)', (task_id, time.time())).fetchone()
+    if not linha:
+        return None
+    user_id, status, total, concluidos, timestamp_conclusao = linha
+    return {'status': status, 'progress': {'current': concluidos, 'total': total}, 'user_id': user_id,
+            'timestamp_conclusao': timestamp_conclusao}
+
+
+def iterar_registros(task_id):
+    """Gera (categoria, registro) de cada processo concluído da tarefa, na ordem de entrada, sem carregar todos na memória."""
+    with closing(_conectar()) as conexao:
+        linhas = conexao.execute(
+            'SELECT payload FROM itens WHERE tarefa_id = ? AND categoria IS NOT NULL ORDER BY indice', (task_id,))
+        for (payload,) in linhas:
+            item = json.loads(payload)
+            yield item['categoria'], item['linha']
+
+
+def obter_itens(task_id, cursor=0, limite=LIMITE_ITENS):
+    """Retorna os itens concluídos depois do `cursor`, já serializados, e o novo cursor.
+
+    O cursor é a ordem de conclusão, então cada item é entregue uma única vez
+    mesmo quando os processos terminam fora da ordem de entrada.
+    """
+    with closing(_conectar()) as conexao:
+        linhas = conexao.execute(
+            'SELECT ordem, payload FROM itens WHERE tarefa_id = ? AND ordem > ? ORDER BY ordem LIMIT ?',
+            (task_id, cursor, limite)).fetchall()
+    return [payload for _, payload in linhas], (linhas[-1][0] if linhas else cursor)
+
+
+def reservar_tarefa(trabalhador):
+    """Reserva a próxima tarefa da fila para o worker.
+
+    Também retoma tarefas cuja reserva expirou (worker reiniciado ou travado).
+    Retorna (task_id, [(indice, numero), ...]) com os processos ainda pendentes, ou None.
+    """
+    agora = time.time()
+    with closing(_conectar()) as conexao:
+        conexao.isolation_level = None
+        conexao.execute('BEGIN IMMEDIATE')
+        try:
+            linha = conexao.execute(
+                "SELECT id FROM tarefas WHERE status = 'iniciando' OR (status = 'processando' AND reservado_ate < ?)"
+                ' ORDER BY criado_em LIMIT 1', (agora,)).fetchone()
+            if not linha:
+                conexao.execute('COMMIT')
+                return None
+            task_id = linha[0]
+            conexao.execute(
+                "UPDATE tarefas SET status = 'processando', trabalhador = ?, reservado_ate = ? WHERE id = ?",
+                (trabalhador, agora + DURACAO_RESERVA, task_id))
+            pendentes = conexao.execute(
+                'SELECT indice, numero FROM itens WHERE tarefa_id = ? AND categoria IS NULL ORDER BY indice', (task_id,)).fetchall()
+            conexao.execute('COMMIT')
+        except BaseException:
+            conexao.execute('ROLLBACK')
+            raise
+    return task_id, pendentes
+
+
+def renovar_reserva(task_id, trabalhador):
+    """Estende a reserva da tarefa enquanto o worker ainda está trabalhando nela."""
+    with closing(_conectar()) as conexao, conexao:
+        conexao.execute(
+            'UPDATE tarefas SET reservado_ate = ? WHERE id = ? AND trabalhador = ?',
+            (time.time() + DURACAO_RESERVA, task_id, trabalhador))
+
+
+def registrar_item(task_id, indice, categoria, dados, tempos=None):
+    """Grava o resultado de um processo. Serve de ponto de retomada se o worker parar.
+
+    `tempos` ({etapa: (segundos, contagem)}) é somado ao detalhamento de tempos da tarefa.
+    """
+    payload = _serializar(Registro(categoria, dados))
+    with closing(_conectar()) as conexao, conexao:
+        atualizado = conexao.execute(
+            'UPDATE itens SET categoria = ?, payload = ? WHERE tarefa_id = ? AND indice = ? AND categoria IS NULL',
+            (categoria, payload, task_id, indice)).rowcount
+        if atualizado:
+            conexao.execute('UPDATE tarefas SET concluidos = concluidos + 1 WHERE id = ?', (task_id,))
+            ordem = conexao.execute('SELECT concluidos FROM tarefas WHERE id = ?', (task_id,)).fetchone()[0]
+            conexao.execute('UPDATE itens SET ordem = ? WHERE tarefa_id = ? AND indice = ?', (ordem, task_id, indice))
+            conexao.executemany(
+                'INSERT INTO tempos (tarefa_id, etapa, segundos, contagem) VALUES (?, ?, ?, ?)'
+                ' ON CONFLICT (tarefa_id, etapa) DO UPDATE SET segundos = segundos + excluded.segundos, contagem = contagem + excluded.contagem',
+                [(task_id, etapa, segundos, contagem) for etapa, (segundos, contagem) in (tempos or {}).items()])
+
+
+def obter_tempos(task_id):
+    """Retorna o tempo total, a contagem e a média de cada etapa das consultas da tarefa."""
+    with closing(_conectar()) as conexao:
+        linhas = conexao.execute(
+            'SELECT etapa, segundos, contagem FROM tempos WHERE tarefa_id = ? ORDER BY etapa', (task_id,)).fetchall()
+    return {etapa: {'segundos': round(segundos, 3), 'contagem': contagem, 'media': round(segundos / contagem, 3)}
+            for etapa, segundos, contagem in linhas}
+
+
+def profundidade_fila():
+    """Retorna quantas tarefas aguardam ou estão em processamento e quantos processos ainda faltam consultar."""
+    with closing(_conectar()) as conexao:
+        linhas = conexao.execute(
+            "SELECT status, COUNT(*), SUM(total - concluidos) FROM tarefas WHERE status != 'concluido' GROUP BY status").fetchall()
+    return {'tarefas': {status: n for status, n, _ in linhas}, 'processos': sum(pendentes for _, _, pendentes in linhas)}
+
+
+def concluir_tarefa(task_id):
+    with closing(_conectar()) as conexao, conexao:
+        conexao.execute(
+            "UPDATE tarefas SET status = 'concluido', timestamp_conclusao = ?, expira_em = ?, reservado_ate = NULL WHERE id = ?",
+            (_agora_texto(), time.time() + TAREFAS_TTL, task_id))
+
+
+def limpar_expiradas():
+    """Remove as tarefas concluídas há mais de TAREFAS_TTL segundos e retorna seus ids."""
+    with closing(_conectar()) as conexao, conexao:
+        expiradas = [linha[0] for linha in conexao.execute('SELECT id FROM tarefas WHERE expira_em <= ?', (time.time(),))]
+        conexao.executemany('DELETE FROM itens WHERE tarefa_id = ?', [(task_id,) for task_id in expiradas])
+        conexao.executemany('DELETE FROM tempos WHERE tarefa_id = ?', [(task_id,) for task_id in expiradas])
+        conexao.executemany('DELETE FROM tarefas WHERE id = ?', [(task_id,) for task_id in expiradas])
+    return expiradas
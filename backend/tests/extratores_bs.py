@@ -0,0 +1,74 @@
+# Extratores originais, baseados no BeautifulSoup. O fluxo principal usa o
+# `extrator.Pagina`; estes ficam como referência para conferir a equivalência
+# dos resultados em test_extratores.py.
+from bs4 import BeautifulSoup
+
+
+def separa_dados(resultado):
+    return [' '.join(n.get_text(separator=' ').strip().split()) for n in resultado]
+
+def extrair_dados_1_grau(soup):
+    try:
+        if not soup.find(id='numeroProcesso'): return None
+        numero = soup.find(id='numeroProcesso').text.strip()
+        foro_vara = f'{soup.find(id="foroProcesso").text.strip() if soup.find(id="foroProcesso") else "Não disponível"} - {soup.find(id="varaProcesso").text.strip() if soup.find(id="varaProcesso") else "Não disponível"}'
+        juiz = soup.find(id='juizProcesso').text.strip() if soup.find(id='juizProcesso') else 'Não disponível'
+        classe = soup.find(id='classeProcesso').text.strip() if soup.find(id='classeProcesso') else 'Não disponível'
+        assunto = soup.find(id='assuntoProcesso').text.strip() if soup.find(id='assuntoProcesso') else 'Não disponível'
+        valor = soup.find(id='valorAcaoProcesso').text.strip() if soup.find(id='valorAcaoProcesso') else 'Não disponível'
+        situacao = soup.find(id='labelSituacaoProcesso').text.strip() if soup.find(id='labelSituacaoProcesso') else 'Não disponível'
+        parte = soup.find(class_='nomeParteEAdvogado').text.strip().replace('\n', '').replace('\t', '').replace('  ', '') if soup.find(class_='nomeParteEAdvogado') else 'Não disponível'
+        resultado = soup.find(class_='containerMovimentacao')
+        movs = separa_dados(resultado.find_all('td') if resultado else [])
+        return [numero, foro_vara, juiz, classe, assunto, situacao, parte, valor, movs]
+    except Exception: return None
+
+def extrair_dados_1_grau_incidente(soup, n_processo):
+    try:
+        header_span = soup.find('span', class_='unj-larger')
+        if not header_span: return None
+        classe = header_span.get_text(strip=True).split('(')[0].strip() if '(' in header_span.get_text() else 'Não disponível'
+        foro_vara = f'{soup.find(id="foroProcesso").text.strip() if soup.find(id="foroProcesso") else "Não disponível"} - {soup.find(id="varaProcesso").text.strip() if soup.find(id="varaProcesso") else "Não disponível"}'
+        assunto = soup.find(id='assuntoProcesso').text.strip() if soup.find(id='assuntoProcesso') else 'Não disponível'
+        primeira_mov = soup.find(class_='descricaoMovimentacao')
+        situacao = primeira_mov.get_text(strip=True).split('\n')[0].strip() if primeira_mov else 'Não disponível'
+        parte = soup.find(class_='nomeParteEAdvogado').text.strip().replace('\n', '').replace('\t', '').replace('  ', '') if soup.find(class_='nomeParteEAdvogado') else 'Não disponível'
+        resultado = soup.find(class_='containerMovimentacao')
+        movs = separa_dados(resultado.find_all('td') if resultado else [])
+        return [n_processo, foro_vara, 'Não disponível', classe, assunto, situacao, parte, 'Não disponível', movs]
+    except Exception: return None
+
+def extrair_dados_2_grau(soup):
+    try:
+        if not soup.find(id='numeroProcesso'): return None
+        numero = soup.find(id='numeroProcesso').text.strip()
+        orgao = soup.find(id='orgaoJulgadorProcesso').text.strip() if soup.find(id='orgaoJulgadorProcesso') else 'Não disponível'
+        relator = soup.find(id='relatorProcesso').text.strip() if soup.find(id='relatorProcesso') else 'Não disponível'
+        classe = soup.find(id='classeProcesso').text.strip() if soup.find(id='classeProcesso') else 'Não disponível'
+        assunto = soup.find(id='assuntoProcesso').text.strip() if soup.find(id='assuntoProcesso') else 'Não disponível'
+        valor = soup.find(id='valorAcaoProcesso').text.strip() if soup.find(id='valorAcaoProcesso') else 'Não disponível'
+        situacao = soup.find(id='situacaoProcesso').text.strip() if soup.find(id='situacaoProcesso') else 'Não disponível'
+        parte = soup.find(class_='nomeParteEAdvogado').text.strip().replace('\n', '').replace('\t', '').replace('  ', '') if soup.find(class_='nomeParteEAdvogado') else 'Não disponível'
+        resultado = soup.find(class_='movimentacaoProcesso')
+        movs = separa_dados(resultado.find_all('td') if resultado else [])
+        return [numero, orgao, relator, classe, assunto, situacao, parte, valor, movs]
+    except AttributeError: return None
+
+
+def classificar(conteudo, n_processo):
+    """Interpreta uma página do mesmo jeito que o fluxo original de consulta."""
+    soup = BeautifulSoup(conteudo, 'html.parser')
+    senha_tag = soup.find('td', class_='modalTitulo', string='Senha do processo')
+    cnj_tag = soup.find('td', string=lambda text: text and "Atendendo a resolução 121 do CNJ" in text)
+    partes_table = soup.find(id='tablePartesPrincipais')
+    movimentacoes_table = soup.find(id='tabelaUltimasMovimentacoes')
+    paginacao = soup.find(class_='resultadoPaginacao')
+    msg_retorno = soup.find(id='mensagemRetorno')
+    return {
+        'dados_2_grau': extrair_dados_2_grau(soup),
+        'segredo_de_justica': bool((senha_tag or cnj_tag) and not (partes_table and movimentacoes_table)),
+        'dados_1_grau': extrair_dados_1_grau(soup),
+        'dados_1_grau_incidente': extrair_dados_1_grau_incidente(soup, n_processo),
+        'paginacao': paginacao.text.strip() if paginacao else None,
+        'mensagem_retorno': msg_retorno.text.strip() if msg_retorno else None,
+    }
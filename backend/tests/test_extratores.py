@@ -0,0 +1,61 @@
+"""Confere o extrator lxml (`extrator.Pagina`) com os extratores originais em BeautifulSoup.
+
+Cada página salva do eSAJ em `benchmarks/paginas` vira um teste de equivalência.
+Os testes de desempenho usam o pytest-benchmark e registram as páginas por
+segundo de cada extrator (`pytest --benchmark-only` roda só eles).
+"""
+import os
+
+import pytest
+
+import extratores_bs
+from extrator import Pagina
+
+DIRETORIO_PAGINAS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'paginas')
+NUMERO_REFERENCIA = '0000000-00.0000.8.26.0000'
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    @pytest.fixture
+    def benchmark():
+        pytest.skip('pytest-benchmark não está instalado')
+
+
+def classificar(conteudo, n_processo):
+    """Interpreta a página com o extrator lxml, no mesmo formato de `extratores_bs.classificar`."""
+    pagina = Pagina(conteudo)
+    return {
+        'dados_2_grau': pagina.dados_2_grau(),
+        'segredo_de_justica': bool(pagina.segredo_de_justica()),
+        'dados_1_grau': pagina.dados_1_grau(),
+        'dados_1_grau_incidente': pagina.dados_1_grau_incidente(n_processo),
+        'paginacao': pagina.paginacao(),
+        'mensagem_retorno': pagina.mensagem_retorno(),
+    }
+
+
+def carregar(nome):
+    with open(os.path.join(DIRETORIO_PAGINAS, nome), 'rb') as arquivo:
+        return arquivo.read()
+
+
+PAGINAS = sorted(nome for nome in os.listdir(DIRETORIO_PAGINAS) if nome.endswith('.html'))
+
+
+@pytest.mark.parametrize('nome', PAGINAS)
+def test_extratores_equivalentes(nome):
+    conteudo = carregar(nome)
+    assert classificar(conteudo, NUMERO_REFERENCIA) == extratores_bs.classificar(conteudo, NUMERO_REFERENCIA)
+
+
+@pytest.mark.parametrize('extrator', [classificar, extratores_bs.classificar], ids=['lxml', 'beautifulsoup'])
+def test_desempenho(benchmark, extrator):
+    paginas = [carregar(nome) for nome in PAGINAS]
+
+    def interpretar_todas():
+        for conteudo in paginas:
+            extrator(conteudo, NUMERO_REFERENCIA)
+
+    benchmark(interpretar_todas)
+    benchmark.extra_info['paginas_por_segundo'] = len(paginas) / benchmark.stats.stats.mean
@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+import ingestao
+
+VALIDO = '1000123-69.2023.8.26.0100'
+OUTRO_VALIDO = '0000001-78.2020.8.26.0100'
+INVALIDO = '1000123-45.2023.8.26.0100'
+
+
+def test_digito_verificador_valido():
+    assert ingestao.digito_verificador_valido(VALIDO)
+    assert ingestao.digito_verificador_valido(OUTRO_VALIDO)
+
+
+def test_digito_verificador_invalido():
+    assert not ingestao.digito_verificador_valido(INVALIDO)
+    assert not ingestao.digito_verificador_valido('texto qualquer')
+
+
+def test_preparar_lista_remove_repetidos_mantendo_a_ordem():
+    lista, invalidos = ingestao.preparar_lista([OUTRO_VALIDO, VALIDO, OUTRO_VALIDO, VALIDO])
+    assert lista == [OUTRO_VALIDO, VALIDO]
+    assert invalidos == {}
+
+
+def test_preparar_lista_devolve_invalidos_como_erro():
+    lista, invalidos = ingestao.preparar_lista([VALIDO, INVALIDO, INVALIDO])
+    assert lista == [VALIDO, INVALIDO]
+    registro = invalidos[INVALIDO]
+    assert registro.categoria == 'erro'
+    assert registro.linha() == {'Número do processo': INVALIDO, 'Informação': ingestao.MSG_DIGITO_INVALIDO}
+
+
+def test_encontra_processos_em_varias_linhas():
+    linhas = [f'{VALIDO}; {OUTRO_VALIDO}', 'sem número', f'proc. {INVALIDO}']
+    assert list(ingestao.encontra_processos(linhas)) == [VALIDO, OUTRO_VALIDO, INVALIDO]
+
+
+def test_xlsx_corrompido_levanta_arquivo_invalido():
+    linhas = ingestao.linhas_do_arquivo(io.BytesIO(b'garbage'), 'p.xlsx')
+    with pytest.raises(ingestao.ArquivoInvalido):
+        ingestao.preparar_lista(ingestao.encontra_processos(linhas))
+
+
+def test_texto_com_bytes_invalidos_ainda_e_lido():
+    linhas = ingestao.linhas_do_arquivo(io.BytesIO(b'\xff\xfe ' + VALIDO.encode() + b'\n'))
+    assert list(ingestao.encontra_processos(linhas)) == [VALIDO]
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import armazenamento
+import tarefas
+from registros import Registro
+
+
+@pytest.fixture(autouse=True)
+def dados_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(armazenamento, 'DADOS_DIR', str(tmp_path))
+
+
+def erro(numero):
+    return ['erro', [numero, 'Falha']]
+
+
+def test_reserva_entrega_so_os_pendentes():
+    task_id = tarefas.criar_tarefa('u1', ['a', 'b', 'c'], {'b': Registro('erro', ['b', 'Em cache'])})
+    assert tarefas.reservar_tarefa('w1') == (task_id, [(0, 'a'), (2, 'c')])
+    # Reservada e dentro do prazo, a tarefa não é entregue a outro worker
+    assert tarefas.reservar_tarefa('w2') is None
+
+
+def test_reserva_expirada_e_retomada_do_ultimo_item_gravado(monkeypatch):
+    monkeypatch.setattr(tarefas, 'DURACAO_RESERVA', -1)
+    task_id = tarefas.criar_tarefa('u1', ['a', 'b', 'c'])
+    tarefas.reservar_tarefa('w1')
+    tarefas.registrar_item(task_id, 0, *erro('a'))
+    # O worker w1 parou sem concluir: w2 retoma só os processos ainda pendentes
+    assert tarefas.reservar_tarefa('w2') == (task_id, [(1, 'b'), (2, 'c')])
+
+
+def test_registrar_item_e_idempotente():
+    task_id = tarefas.criar_tarefa('u1', ['a', 'b'])
+    tarefas.reservar_tarefa('w1')
+    tarefas.registrar_item(task_id, 1, *erro('b'), tempos={'processo': (0.5, 1)})
+    # Um worker que retomou a tarefa grava o mesmo item de novo
+    tarefas.registrar_item(task_id, 1, 'inconclusivo', ['b', 'Outro resultado'], tempos={'processo': (0.5, 1)})
+    tarefas.registrar_item(task_id, 0, *erro('a'))
+
+    assert tarefas.obter_tarefa(task_id)['progress'] == {'current': 2, 'total': 2}
+    itens, cursor = tarefas.obter_itens(task_id)
+    assert cursor == 2
+    # Os itens saem na ordem de conclusão, cada um uma vez só, com o primeiro resultado gravado
+    assert [json.loads(item)['linha'] for item in itens] == [
+        {'Número do processo': 'b', 'Informação': 'Falha'},
+        {'Número do processo': 'a', 'Informação': 'Falha'},
+    ]
+    assert tarefas.obter_tempos(task_id)['processo']['contagem'] == 1
+
+
+def test_limpar_expiradas_remove_so_as_concluidas_vencidas(monkeypatch):
+    em_andamento = tarefas.criar_tarefa('u1', ['a'])
+    monkeypatch.setattr(tarefas, 'TAREFAS_TTL', -1)
+    vencida = tarefas.criar_tarefa('u1', ['b'], {'b': Registro('erro', ['b', 'Em cache'])})
+
+    assert tarefas.limpar_expiradas() == [vencida]
+    assert tarefas.obter_tarefa(vencida) is None
+    assert tarefas.obter_itens(vencida) == ([], 0)
+    assert tarefas.obter_tarefa(em_andamento)['status'] == 'iniciando'
@@ -0,0 +1,150 @@
+"""Processo worker: consome a fila de tarefas e faz as consultas ao eSAJ.
+
+Roda separado do servidor web (`python worker.py`). Vários workers podem
+compartilhar a mesma fila; cada tarefa é reservada por um só deles, e uma
+reserva que expira (worker reiniciado ou travado) é retomada a partir dos
+processos ainda pendentes.
+"""
+import os
+import time
+import uuid
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+
+import tarefas
+import metricas
+import monitoramento
+import exportacao
+from pesquisa import consulta_processo_compartilhada, verificar_processo
+from cliente_esaj import MAX_CONEXOES
+from pool_navegadores import caminho_chromedriver
+
+# Configurações do worker, carregadas do ambiente
+TAREFAS_SIMULTANEAS = int(os.getenv("WORKER_TAREFAS_SIMULTANEAS", "2"))
+INTERVALO_FILA = float(os.getenv("WORKER_INTERVALO", "2"))  # em segundos
+INTERVALO_LIMPEZA = 300  # em segundos
+INTERVALO_METRICAS = float(os.getenv("WORKER_INTERVALO_METRICAS", "15"))  # em segundos
+INTERVALO_MONITORAMENTO = 60  # em segundos entre buscas por processos acompanhados com verificação vencida
+LOTE_MONITORAMENTO = int(os.getenv("MONITORAMENTO_LOTE", "100"))
+
+logger = logging.getLogger(__name__)
+
+
+def extrai_dados_e_atualiza_tarefa(task_id, pendentes):
+    """Consulta os processos pendentes da tarefa, gravando cada resultado assim que fica pronto."""
+
+    def consulta_e_registra(item):
+        indice, n_processo = item
+        with metricas.coletar() as tempos:
+            with metricas.medir('processo'):
+                categoria, dados = consulta_processo_compartilhada(n_processo)
+        tarefas.registrar_item(task_id, indice, categoria, dados, tempos)
+
+    # As consultas rodam em paralelo, limitadas pelas conexões HTTP com o eSAJ; o navegador
+    # só é usado quando a página exige JavaScript, e quem precisa dele espera uma vaga no pool
+    with ThreadPoolExecutor(max_workers=MAX_CONEXOES) as executor:
+        for _ in executor.map(consulta_e_registra, pendentes):
+            pass
+    tarefas.concluir_tarefa(task_id)
+    exportacao.gerar_padrao(task_id)
+
+
+def verificar_acompanhados(vencidos):
+    """Reconsulta os processos acompanhados e registra os que mudaram."""
+
+    def verificar(item):
+        n_processo, instancia, impressao = item
+        try:
+            resultado = verificar_processo(n_processo, instancia, impressao)
+        except Exception:
+            # A reserva expira e o processo é verificado de novo
+            logger.exception('Falha ao verificar o processo acompanhado %s', n_processo)
+            return
+        if resultado is None:
+            monitoramento.registrar_sem_alteracao(n_processo)
+            return
+        instancia, categoria, dados = resultado
+        monitoramento.registrar_verificacao(n_processo, instancia, categoria, dados, tarefas.formatar_linha(categoria, dados))
+
+    with ThreadPoolExecutor(max_workers=MAX_CONEXOES) as executor:
+        for _ in executor.map(verificar, vencidos):
+            pass
+
+
+def _executar_tarefa(task_id, pendentes):
+    try:
+        extrai_dados_e_atualiza_tarefa(task_id, pendentes)
+    except Exception:
+        # A reserva expira e a tarefa é retomada do último processo gravado
+        logger.exception('Falha ao processar a tarefa %s', task_id)
+
+
+def executar(parar=None):
+    """Laço principal: reserva tarefas da fila e as processa até `parar` ser sinalizado."""
+    parar = parar or threading.Event()
+    trabalhador = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+    ativas = {}
+    ultima_limpeza = ultima_renovacao = ultimas_metricas = ultimo_monitoramento = 0.0
+    monitorando = None
+
+    while not parar.is_set():
+        try:
+            ativas = {task_id: thread for task_id, thread in ativas.items() if thread.is_alive()}
+            agora = time.monotonic()
+            if agora - ultima_renovacao >= tarefas.DURACAO_RESERVA / 3:
+                for task_id in ativas:
+                    tarefas.renovar_reserva(task_id, trabalhador)
+                ultima_renovacao = agora
+            if agora - ultima_limpeza >= INTERVALO_LIMPEZA:
+                for task_id in tarefas.limpar_expiradas():
+                    exportacao.remover(task_id)
+                metricas.remover_antigos(tarefas.TAREFAS_TTL)
+                monitoramento.limpar_alteracoes_antigas()
+                ultima_limpeza = agora
+            if agora - ultimas_metricas >= INTERVALO_METRICAS:
+                metricas.salvar(trabalhador)
+                ultimas_metricas = agora
+
+            if agora - ultimo_monitoramento >= INTERVALO_MONITORAMENTO and not (monitorando and monitorando.is_alive()):
+                vencidos = monitoramento.reservar_vencidos(LOTE_MONITORAMENTO)
+                if vencidos:
+                    monitorando = threading.Thread(target=verificar_acompanhados, args=(vencidos,), daemon=True)
+                    monitorando.start()
+                # Com o lote cheio, busca o próximo assim que este terminar
+                ultimo_monitoramento = 0.0 if len(vencidos) == LOTE_MONITORAMENTO else agora
+
+            if len(ativas) < TAREFAS_SIMULTANEAS:
+                reservada = tarefas.reservar_tarefa(trabalhador)
+                if reservada:
+                    task_id, pendentes = reservada
+                    thread = threading.Thread(target=_executar_tarefa, args=(task_id, pendentes), daemon=True)
+                    thread.start()
+                    ativas[task_id] = thread
+                    continue
+        except Exception:
+            logger.exception('Falha ao consultar a fila de tarefas')
+        parar.wait(INTERVALO_FILA)
+
+
+def iniciar_em_segundo_plano():
+    """Roda o worker numa thread do próprio processo (útil no desenvolvimento local)."""
+    thread = threading.Thread(target=executar, daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    # Resolve o chromedriver na inicialização, e não no meio da primeira tarefa
+    try:
+        logger.info('chromedriver: %s', caminho_chromedriver())
+    except Exception:
+        logger.exception('Não foi possível resolver o chromedriver; nova tentativa ao abrir o primeiro navegador')
+    executar()